@@ -85,6 +85,35 @@ DATABASES = {
 }
 
 
+# Cache
+# 'shared' jest wspólny dla procesów WWW i procesu roboczego (stan pingów, wersje danych).
+# Dane widoków mają osobny alias 'views' - ich wiele wpisów nie może wypychać z 'shared'
+# stanu pingów ani wersji (FileBasedCache po MAX_ENTRIES usuwa losową 1/3 plików).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'TIMEOUT': None,
+    },
+    'views': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'views',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Cache danych widoków (rentalapp/caching.py) - dowolny alias z CACHES,
+# np. RedisCache przy kilku serwerach aplikacji.
+VIEW_CACHE = {
+    'ALIAS': 'views',
+    'TIMEOUT': 3600,         # wpisy starych wersji danych wygasają po tym czasie [s]
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -133,3 +162,64 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/login/'
 
+
+# Monitorowanie przyczepek (ping)
+
+TRAILER_PING = {
+    'INTERVAL': 300,      # odstęp między przebiegami [s]
+    'CONCURRENCY': 256,   # maksymalna liczba równoczesnych pingów
+    'TIMEOUT': 2.0,       # limit czasu pojedynczego pingu [s]
+    'JITTER': 1.0,        # losowe opóźnienie startu pingu [s]
+}
+
+
+# Retencja logów przyczepek
+
+TRAILER_LOG_RETENTION = {
+    # dni przechowywania wg typu zdarzenia; typy spoza listy są trzymane bezterminowo
+    'TTL_DAYS': {
+        'ping': 30,
+        'status_change': 365,
+    },
+    'BATCH_SIZE': 500,    # wierszy usuwanych w jednej transakcji
+    'PAUSE': 0.05,        # przerwa między porcjami [s]
+    'MAX_SECONDS': 20,    # limit czasu jednego uruchomienia [s]
+    'INTERVAL': 3600,     # co ile proces roboczy uruchamia retencję [s]
+    'ARCHIVE_DIR': BASE_DIR / 'archive',
+}
+
+
+# Raporty PDF generowane w tle
+
+REPORTS = {
+    'STORAGE_DIR': BASE_DIR / 'reports',
+    'WORKERS': 2,            # liczba wątków generujących raporty
+    'POLL_INTERVAL': 2,      # co ile proces roboczy sprawdza kolejkę [s]
+    'STALE_AFTER': 1800,     # po tylu sekundach zawieszone zadanie wraca do kolejki
+    'KEEP': 5,               # liczba przechowywanych gotowych raportów
+    'RENDER_PROCESSES': None,  # procesy renderujące fragmenty PDF jednego raportu (None = liczba rdzeni)
+}
+
+
+# Strumień zmian statusu przyczepek (Server-Sent Events). Działa tylko pod serwerem ASGI -
+# pod WSGI strony go nie otwierają, a widok zwraca 204.
+
+TRAILER_EVENTS = {
+    'POLL_INTERVAL': 2,      # co ile sekund wspólne dla wszystkich połączeń zadanie sprawdza nowe wpisy logu
+    'HEARTBEAT': 15,         # komentarz podtrzymujący połączenie przy braku zdarzeń [s]
+    'MAX_DURATION': 300,     # po tylu sekundach przeglądarka łączy się ponownie (Last-Event-ID)
+    'RETRY': 3000,           # opóźnienie ponownego połączenia po zerwaniu [ms]
+    'BATCH_SIZE': 500,
+    'QUEUE_SIZE': 100,       # paczek czekających na wolne połączenie; po przepełnieniu doczytuje ono z bazy
+}
+
+
+# Synchronizacja przyrostowa (/sync/)
+
+SYNC = {
+    'TOMBSTONE_DAYS': 30,    # jak długo trzymamy znaczniki usunięć (starszy kursor wymaga pełnej synchronizacji)
+    'PAGE_SIZE': 500,        # domyślny limit wierszy na sekcję odpowiedzi
+    'MAX_PAGE_SIZE': 5000,
+    'SAFETY_MARGIN': 60,     # kursor nie wychodzi poza teraz minus margines - zmiany zatwierdzone później nie giną [s]
+}
+
@@ -5,8 +5,4 @@ class RentalappConfig(AppConfig):
     name = 'rentalapp'
 
     def ready(self):
-        from .utils import update_trailer_status
-        import threading
-
-        thread = threading.Thread(target=update_trailer_status, daemon=True)
-        thread.start()
+        from . import signals  # noqa: F401
@@ -0,0 +1,106 @@
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from . import versions
+from .availability import bookings_between, free_trailers
+from .models import RentalHistory, RentalTrailer, Trailer
+from .spatial import nearest_trailers
+
+MAX_BULK_TRAILERS = 500
+
+REJECT_REASONS = {
+    'unknown': "Nie ma takiej przyczepki.",
+    'already_assigned': "Przyczepka jest już w tym wynajmie.",
+    'busy': "Przyczepka jest przypisana do innego wynajmu w tym terminie.",
+}
+
+
+@dataclass
+class AssignmentResult:
+    """Wynik zbiorczego przypisania: przyjęte przyczepki [(id, nazwa)] i odrzucone {id: powód}"""
+    accepted: list = field(default_factory=list)
+    rejected: dict = field(default_factory=dict)
+
+    def as_dict(self):
+        return {
+            'accepted': [{'id': trailer_id, 'name': name} for trailer_id, name in self.accepted],
+            'rejected': [
+                {'id': trailer_id, 'reason': reason, 'message': REJECT_REASONS[reason]}
+                for trailer_id, reason in self.rejected.items()
+            ],
+        }
+
+
+def assign_trailers(rental, trailer_ids, user=None):
+    """
+    Przypisuje wiele przyczepek do wynajmu naraz: jedno zapytanie o przyczepki,
+    jedno o kolizje w terminie wynajmu, a potem bulk_create pozycji i wpisów
+    historii w jednej transakcji. Przyczepek zajętych albo nieistniejących nie
+    dodajemy - trafiają do ``rejected`` z powodem.
+    """
+    result = AssignmentResult()
+    trailer_ids = list(dict.fromkeys(trailer_ids))
+    if not trailer_ids:
+        return result
+
+    with transaction.atomic():
+        names = dict(Trailer.objects.filter(pk__in=trailer_ids).values_list('pk', 'name'))
+        collisions = {}
+        for trailer_id, rental_id in (
+            bookings_between(rental.start_date, rental.end_date)
+            .filter(trailer_id__in=names)
+            .values_list('trailer_id', 'rental_id')
+        ):
+            if collisions.get(trailer_id) != 'already_assigned':
+                collisions[trailer_id] = 'already_assigned' if rental_id == rental.pk else 'busy'
+
+        for trailer_id in trailer_ids:
+            if trailer_id not in names:
+                result.rejected[trailer_id] = 'unknown'
+            elif trailer_id in collisions:
+                result.rejected[trailer_id] = collisions[trailer_id]
+            else:
+                result.accepted.append((trailer_id, names[trailer_id]))
+
+        if result.accepted:
+            # bulk_create pomija RentalTrailer.save(), więc terminy kopiujemy sami.
+            RentalTrailer.objects.bulk_create([
+                RentalTrailer(
+                    rental=rental,
+                    trailer_id=trailer_id,
+                    start_date=rental.start_date,
+                    end_date=rental.end_date,
+                )
+                for trailer_id, _ in result.accepted
+            ])
+            RentalHistory.objects.bulk_create([
+                RentalHistory(
+                    rental=rental,
+                    description=f"Przyczepka {name} została dodana do wynajmu.",
+                    user=user,
+                )
+                for _, name in result.accepted
+            ])
+
+    if result.accepted:
+        # bulk_create omija sygnały, więc wersję danych podbijamy ręcznie.
+        versions.bump('rentaltrailer')
+    return result
+
+
+def pick_free_trailers(rental, count, status=None, near=None):
+    """
+    ``count`` przyczepek wolnych w terminie wynajmu (opcjonalnie o danym statusie):
+    najbliższe punktowi ``near`` (szer., dł.) albo kolejne według nazwy.
+    """
+    candidates = free_trailers(rental.start_date, rental.end_date)
+    if status:
+        candidates = candidates.filter(status=status)
+    if near is None:
+        return list(candidates.order_by('name').values_list('pk', flat=True)[:count])
+
+    def accept(ids):
+        return set(candidates.filter(pk__in=ids).values_list('pk', flat=True))
+
+    return [trailer_id for trailer_id, _ in nearest_trailers(*near, k=count, accept=accept)]
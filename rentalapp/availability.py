@@ -0,0 +1,96 @@
+from bisect import bisect_right
+from collections import defaultdict
+
+from .models import RentalTrailer, Trailer
+
+
+class BookingIndex:
+    """
+    Przypisania przyczepek do terminów trzymane w pamięci.
+
+    Dla każdej przyczepki przechowuje posortowane początki przedziałów oraz
+    narastające maksimum ich końców, więc pytanie "czy przyczepka jest zajęta
+    w [start, end]" to jedno wyszukiwanie binarne.
+    """
+
+    def __init__(self, bookings):
+        intervals = defaultdict(list)
+        for trailer_id, start, end in bookings:
+            intervals[trailer_id].append((start, end))
+
+        self._starts = {}
+        self._max_ends = {}
+        for trailer_id, items in intervals.items():
+            items.sort()
+            max_ends = []
+            current = None
+            for _, end in items:
+                current = end if current is None or end > current else current
+                max_ends.append(current)
+            self._starts[trailer_id] = [start for start, _ in items]
+            self._max_ends[trailer_id] = max_ends
+
+    @classmethod
+    def for_ranges(cls, ranges):
+        """Indeks ze wszystkich przypisań nachodzących na podane przedziały dat (jedno zapytanie)"""
+        ranges = list(ranges)
+        if not ranges:
+            return cls([])
+        bookings = (
+            RentalTrailer.objects
+            .filter(
+                start_date__lte=max(end for _, end in ranges),
+                end_date__gte=min(start for start, _ in ranges),
+            )
+            .values_list('trailer_id', 'start_date', 'end_date')
+        )
+        return cls(bookings)
+
+    def is_busy(self, trailer_id, start, end):
+        starts = self._starts.get(trailer_id)
+        if not starts:
+            return False
+        position = bisect_right(starts, end)
+        return position > 0 and self._max_ends[trailer_id][position - 1] >= start
+
+    def busy_trailers(self, start, end):
+        return {trailer_id for trailer_id in self._starts if self.is_busy(trailer_id, start, end)}
+
+
+def bookings_between(start, end):
+    """Przypisania nachodzące na [start, end] - korzysta z indeksów na terminach RentalTrailer"""
+    return RentalTrailer.objects.filter(start_date__lte=end, end_date__gte=start)
+
+
+def is_trailer_free(trailer_id, start, end):
+    return not bookings_between(start, end).filter(trailer_id=trailer_id).exists()
+
+
+def free_trailers(start, end):
+    """Przyczepki bez żadnego przypisania w terminie [start, end]"""
+    return Trailer.objects.exclude(id__in=bookings_between(start, end).values('trailer_id'))
+
+
+def available_trailers_for(rentals, trailers=None):
+    """
+    Dostępne przyczepki dla wielu wynajmów naraz: {id_wynajmu: [Trailer, ...]}.
+
+    Przyczepka jest niedostępna, jeśli jest przypisana do dowolnego wynajmu
+    (także bieżącego) nachodzącego na termin danego wynajmu.
+    """
+    rentals = list(rentals)
+    if not rentals:
+        return {}
+
+    index = BookingIndex.for_ranges((rental.start_date, rental.end_date) for rental in rentals)
+    if trailers is None:
+        trailers = Trailer.objects.only('id', 'name').order_by('name')
+    trailers = list(trailers)
+
+    return {
+        rental.id: [
+            trailer for trailer in trailers
+            if not index.is_busy(trailer.id, rental.start_date, rental.end_date)
+        ]
+        for rental in rentals
+    }
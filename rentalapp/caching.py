@@ -0,0 +1,44 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .versions import version_key
+
+VIEW_CACHE_DEFAULTS = {
+    'ALIAS': 'views',
+    'TIMEOUT': 3600,
+}
+
+_MISSING = object()
+
+
+def view_cache_settings():
+    """Ustawienia cache widoków z settings.VIEW_CACHE uzupełnione domyślnymi"""
+    return {**VIEW_CACHE_DEFAULTS, **getattr(settings, 'VIEW_CACHE', {})}
+
+
+def cache_key(name, depends_on, parts=()):
+    """
+    Klucz zawiera wersje modeli, od których zależą dane - po zapisie modelu
+    (sygnały w signals.py) powstaje nowy klucz, a stary wpis po prostu wygasa.
+    """
+    key = f"view:{name}:{version_key(*depends_on)}"
+    if parts:
+        key += ":" + hashlib.sha1(repr(tuple(parts)).encode()).hexdigest()[:16]
+    return key
+
+
+def cached(name, depends_on, build, parts=()):
+    """
+    Wynik ``build()`` z cache albo obliczony i zapisany. Cache'ujemy dane
+    (listy obiektów, słowniki), nie całe strony - te zawierają token CSRF i komunikaty.
+    """
+    config = view_cache_settings()
+    cache = caches[config['ALIAS']]
+    key = cache_key(name, depends_on, parts)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = build()
+        cache.set(key, value, config['TIMEOUT'])
+    return value
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Trailer, TrailerLog
+
+EVENT_DEFAULTS = {
+    'POLL_INTERVAL': 2,
+    'HEARTBEAT': 15,
+    'MAX_DURATION': 300,
+    'RETRY': 3000,
+    'BATCH_SIZE': 500,
+    'QUEUE_SIZE': 100,
+}
+
+STATUS_EVENT_TYPES = ('status_change', 'ping')
+
+logger = logging.getLogger(__name__)
+
+
+def event_settings():
+    """Ustawienia strumienia zdarzeń z settings.TRAILER_EVENTS uzupełnione domyślnymi"""
+    return {**EVENT_DEFAULTS, **getattr(settings, 'TRAILER_EVENTS', {})}
+
+
+def live_events_enabled(request):
+    """
+    Strumień SSE ma sens tylko pod serwerem ASGI. Pod WSGI Django buforuje
+    asynchroniczną odpowiedź strumieniową, więc każde połączenie trzymałoby
+    wątek roboczy przez MAX_DURATION i dostawało zdarzenia dopiero na końcu.
+    """
+    return isinstance(request, ASGIRequest)
+
+
+def format_event(event, data, event_id=None):
+    """Jedna wiadomość w formacie text/event-stream"""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def latest_log_id():
+    return await TrailerLog.objects.order_by('-id').values_list('id', flat=True).afirst() or 0
+
+
+async def status_events(after_id, trailer_id=None, limit=EVENT_DEFAULTS['BATCH_SIZE']):
+    """
+    Zmiany statusu zapisane w logu po ``after_id``: (id ostatniego przejrzanego
+    wpisu, [(id_logu, dane)]). Status bierzemy z bieżącego wiersza przyczepki -
+    zbiorczy zapis pingów zmienia go w tej samej transakcji co log, a ręczne
+    zmiany mają wolny tekst zamiast przejścia.
+    """
+    logs = TrailerLog.objects.filter(id__gt=after_id, event_type__in=STATUS_EVENT_TYPES).exclude(trailer=None)
+    if trailer_id is not None:
+        logs = logs.filter(trailer_id=trailer_id)
+    rows = [row async for row in logs.order_by('id').values(
+        'id', 'trailer_id', 'event_type', 'message', 'timestamp')[:limit]]
+    if not rows:
+        return after_id, []
+
+    labels = dict(Trailer.STATUS_CHOICES)
+    trailers = {
+        trailer['id']: trailer
+        async for trailer in Trailer.objects.filter(pk__in={row['trailer_id'] for row in rows})
+        .values('id', 'name', 'status')
+    }
+    events = []
+    for row in rows:
+        trailer = trailers.get(row['trailer_id'])
+        if trailer is None:
+            continue
+        events.append((row['id'], {
+            'trailer_id': trailer['id'],
+            'name': trailer['name'],
+            'status': trailer['status'],
+            'status_display': labels.get(trailer['status'], trailer['status']),
+            'event_type': row['event_type'],
+            'message': row['message'],
+            'timestamp': row['timestamp'],
+        }))
+    return rows[-1]['id'], events
+
+
+class Subscription:
+    """Kolejka paczek zdarzeń jednego połączenia; ``lagging`` - kolejka się przepełniła i trzeba doczytać z bazy"""
+
+    def __init__(self, size):
+        self.queue = asyncio.Queue(maxsize=size)
+        self.lagging = False
+
+
+class StatusBroadcaster:
+    """
+    Jedno odpytywanie logu na proces, niezależnie od liczby otwartych kart:
+    zadanie w pętli zdarzeń co POLL_INTERVAL pobiera nowe wpisy i rozsyła je
+    do kolejek subskrybentów. Kończy się, gdy nikt już nie słucha.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.task = None
+
+    def subscribe(self, last_id):
+        """
+        Nowa kolejka połączenia. Zadanie startuje od ``last_id`` pierwszego
+        połączenia, a nie od ostatniego wpisu w chwili uruchomienia - wpis zapisany
+        między doczytaniem połączenia a pierwszym odpytaniem nie może przepaść.
+        """
+        subscription = Subscription(event_settings()['QUEUE_SIZE'])
+        self.subscribers.add(subscription)
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.task = loop.create_task(self.run(last_id))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def publish(self, events):
+        for subscription in self.subscribers:
+            try:
+                subscription.queue.put_nowait(events)
+            except asyncio.QueueFull:
+                subscription.lagging = True
+
+    async def run(self, last_id):
+        config = event_settings()
+        try:
+            while self.subscribers:
+                scanned_id, events = await status_events(last_id, limit=config['BATCH_SIZE'])
+                if events:
+                    self.publish(events)
+                if scanned_id != last_id:
+                    # mogą czekać kolejne wpisy - pytamy od razu, bez przerwy
+                    last_id = scanned_id
+                    continue
+                await asyncio.sleep(config['POLL_INTERVAL'])
+        except Exception:
+            # subskrybenci dostają dalej heartbeat, a po MAX_DURATION łączą się ponownie i uruchamiają zadanie od nowa
+            logger.exception("Błąd odpytywania logu zdarzeń przyczepek")
+
+
+broadcaster = StatusBroadcaster()
+
+
+async def event_stream(last_id, trailer_id=None):
+    """
+    Strumień SSE zmian statusu z współdzielonego odpytywania (StatusBroadcaster).
+    Najpierw doczytuje z bazy wpisy po ``last_id`` (ponowne połączenie z
+    Last-Event-ID), potem czeka na paczki z kolejki; przy ciszy wysyła komentarz,
+    żeby pośrednicy nie zamknęli połączenia. Po MAX_DURATION kończy strumień -
+    przeglądarka łączy się ponownie i niczego nie gubi.
+    """
+    config = event_settings()
+    subscription = broadcaster.subscribe(last_id)
+    try:
+        started = last_sent = time.monotonic()
+        yield f"retry: {config['RETRY']}\n\n"
+        catch_up = True
+        while True:
+            if catch_up or subscription.lagging:
+                # to, co już czeka w kolejce, i tak przyjdzie z bazy
+                subscription.lagging = False
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                while True:
+                    scanned_id, events = await status_events(last_id, trailer_id, config['BATCH_SIZE'])
+                    for event_id, data in events:
+                        yield format_event('status', data, event_id)
+                        last_sent = time.monotonic()
+                    if scanned_id == last_id:
+                        break
+                    last_id = scanned_id
+                catch_up = False
+
+            remaining = config['MAX_DURATION'] - (time.monotonic() - started)
+            if remaining <= 0:
+                return
+            until_heartbeat = config['HEARTBEAT'] - (time.monotonic() - last_sent)
+            try:
+                events = await asyncio.wait_for(subscription.queue.get(), max(0, min(remaining, until_heartbeat)))
+            except asyncio.TimeoutError:
+                if time.monotonic() - last_sent >= config['HEARTBEAT']:
+                    yield ": heartbeat\n\n"
+                    last_sent = time.monotonic()
+                continue
+            for event_id, data in events:
+                if event_id <= last_id or (trailer_id is not None and data['trailer_id'] != trailer_id):
+                    continue
+                yield format_event('status', data, event_id)
+                last_id = event_id
+                last_sent = time.monotonic()
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,60 @@
+import csv
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Plik-atrapa dla csv.writer - zwraca zapisany wiersz zamiast go buforować"""
+
+    def write(self, value):
+        return value
+
+
+def date_param(request, name):
+    """Data z GET; pusta, źle zapisana albo niemożliwa (np. 2024-02-30) - None, czyli bez filtra"""
+    try:
+        return parse_date(request.GET.get(name) or '')
+    except ValueError:
+        return None
+
+
+def date_filter(request, field, end_field=None):
+    """
+    Filtr ?date_from=&date_to= (daty włącznie) dla pól DateField. Z ``end_field``
+    wybiera okresy [field, end_field] nachodzące na podany zakres.
+    """
+    lookups = {}
+    date_from = date_param(request, 'date_from')
+    date_to = date_param(request, 'date_to')
+    if date_from:
+        lookups[f'{end_field or field}__gte'] = date_from
+    if date_to:
+        lookups[f'{field}__lte'] = date_to
+    return lookups
+
+
+def iter_csv(header, rows):
+    writer = csv.writer(Echo())
+    # BOM - Excel rozpoznaje wtedy UTF-8 i poprawnie pokazuje polskie znaki
+    yield '﻿' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_export(name, header, queryset, row=None):
+    """
+    Strumieniuje wynik zapytania jako CSV. Wiersze są pobierane przez
+    ``.iterator()`` porcjami po EXPORT_CHUNK_SIZE (na PostgreSQL kursorem po
+    stronie serwera), więc zużycie pamięci nie zależy od liczby wierszy.
+    """
+    rows = queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    if row is not None:
+        rows = map(row, rows)
+    response = StreamingHttpResponse(iter_csv(header, rows), content_type='text/csv; charset=utf-8')
+    filename = f"{name}-{timezone.localdate():%Y%m%d}.csv"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,104 @@
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9       # ok. 5 m x 5 m - więcej niż potrzebujemy dla przyczepek
+MAX_COVER_CELLS = 32
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash punktu: na przemian połowimy zakres długości i szerokości, po 5 bitów na znak"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (rng[0] + rng[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            rng[0] = middle
+        else:
+            value <<= 1
+            rng[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def prefix_range(prefix):
+    """
+    Zakres (od, do) obejmujący wszystkie geohashe z danym prefiksem. Zwykłe
+    porównanie korzysta z indeksu na każdej bazie, w przeciwieństwie do LIKE 'prefiks%'.
+    """
+    return prefix, prefix + "~"
+
+
+def cell_size(precision):
+    """Wymiary komórki geohash (stopnie szerokości, stopnie długości)"""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def clamp_bbox(west, south, east, north):
+    """Przycina prostokąt mapy do zakresu współrzędnych; None oznacza cały świat"""
+    south, north = max(-90.0, min(south, north)), min(90.0, max(south, north))
+    if east - west >= 360:
+        return None
+    west = (west + 180) % 360 - 180
+    east = (east + 180) % 360 - 180
+    return west, south, east, north
+
+
+def split_antimeridian(bbox):
+    """Prostokąt przechodzący przez południk 180° dzielimy na dwa"""
+    west, south, east, north = bbox
+    if west <= east:
+        return [bbox]
+    return [(west, south, 180.0, north), (-180.0, south, east, north)]
+
+
+def _steps(start, stop, step):
+    """Punkty co ``step`` od start do stop włącznie - trafiają w każdą komórkę, którą przecina odcinek"""
+    count = int((stop - start) / step) + 1
+    return [start + i * step for i in range(count)] + [stop]
+
+
+def cover(bbox, max_cells=MAX_COVER_CELLS):
+    """
+    Prefiksy geohash pokrywające prostokąt - możliwie najdłuższe, ale nie więcej
+    niż ``max_cells``. Każdy prefiks to jeden zakres na indeksie kolumny geohash.
+    """
+    best = {""}
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        lat_step, lon_step = cell_size(precision)
+        cells = set()
+        for west, south, east, north in split_antimeridian(bbox):
+            if ((north - south) / lat_step + 2) * ((east - west) / lon_step + 2) > max_cells * 4:
+                return best
+            cells.update(
+                encode(latitude, longitude, precision)
+                for latitude in _steps(south, north, lat_step)
+                for longitude in _steps(west, east, lon_step)
+            )
+        if len(cells) > max_cells:
+            return best
+        best = cells
+    return best
+
+
+def parse_point(text):
+    """'52.23,21.01' -> (52.23, 21.01); None dla niepoprawnych współrzędnych"""
+    try:
+        latitude, longitude = (float(value) for value in (text or '').split(','))
+    except ValueError:
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def cluster_precision(zoom):
+    """Długość prefiksu geohash, po którym grupujemy przyczepki przy danym powiększeniu mapy"""
+    return max(1, min(GEOHASH_PRECISION, (zoom + 1) // 2 + 1))
@@ -0,0 +1,37 @@
+from django.core.cache import caches
+from django.utils import timezone
+
+SNAPSHOT_KEY = "liveness:snapshot"
+PROBE_KEY = "liveness:probe:{}"
+
+
+def _cache():
+    return caches['shared']
+
+
+def record_sweep(results, checked_at=None):
+    """Zapisuje wynik całego przebiegu {id_przyczepki: odpowiada} jako jeden wpis"""
+    checked_at = checked_at or timezone.now()
+    snapshot = {trailer_id: (alive, checked_at) for trailer_id, alive in results.items()}
+    _cache().set(SNAPSHOT_KEY, snapshot, None)
+
+
+def record_probe(trailer_id, alive, ttl=None):
+    """Zapisuje wynik pojedynczego, ręcznie zleconego pingu"""
+    entry = (alive, timezone.now())
+    _cache().set(PROBE_KEY.format(trailer_id), entry, ttl)
+    return {'alive': entry[0], 'checked_at': entry[1]}
+
+
+def get(trailer_id):
+    """Ostatni znany stan przyczepki: {'alive': bool, 'checked_at': datetime} albo None"""
+    cache = _cache()
+    entries = [
+        cache.get(SNAPSHOT_KEY, {}).get(trailer_id),
+        cache.get(PROBE_KEY.format(trailer_id)),
+    ]
+    entries = [entry for entry in entries if entry]
+    if not entries:
+        return None
+    alive, checked_at = max(entries, key=lambda entry: entry[1])
+    return {'alive': alive, 'checked_at': checked_at}
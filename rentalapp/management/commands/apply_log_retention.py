@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from rentalapp.retention import apply_retention
+
+
+class Command(BaseCommand):
+    help = ("Podsumowuje stare pingi, archiwizuje i usuwa logi przyczepek po czasie retencji "
+            "oraz stare znaczniki usunięć synchronizacji.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-seconds', type=float, default=None,
+                            help="Limit czasu usuwania w jednym uruchomieniu [s].")
+
+    def handle(self, *args, **options):
+        self.stdout.write(apply_retention(max_seconds=options['max_seconds']))
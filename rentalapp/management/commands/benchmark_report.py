@@ -0,0 +1,108 @@
+import os
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.template.loader import get_template
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rentalapp.models import Company, Rental, ServiceHistory, Trailer, WarehouseItem
+from rentalapp.pricing import rental_cost
+from rentalapp.reporting import build_report, iter_report_parts
+
+BATCH_SIZE = 2000
+
+
+class Benchmark(Exception):
+    """Przerywa transakcję z danymi syntetycznymi, żeby nic nie zostało w bazie"""
+
+
+def synthetic_dataset(rows):
+    """Tworzy ``rows`` wierszy rozłożonych na przyczepki, firmy, wynajmy, serwisy i magazyn"""
+    trailers_count = max(rows // 5, 1)
+    companies_count = max(rows // 20, 1)
+    rentals_count = max(rows * 2 // 5, 1)
+    services_count = max(rows // 5, 1)
+    items_count = max(rows - trailers_count - companies_count - rentals_count - services_count, 1)
+    statuses = [code for code, _ in Trailer.STATUS_CHOICES]
+    start = date.today() - timedelta(days=365)
+
+    trailers = Trailer.objects.bulk_create((
+        Trailer(
+            name=f"Benchmark {i}",
+            ip_address=f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            serial_number=f"BENCH-{i}",
+            registration_number=f"BM {i}",
+            operator_phone="000000000",
+            status=statuses[i % len(statuses)],
+        ) for i in range(trailers_count)
+    ), batch_size=BATCH_SIZE)
+    companies = Company.objects.bulk_create(
+        (Company(name=f"Firma {i}") for i in range(companies_count)), batch_size=BATCH_SIZE)
+
+    def rental(i):
+        start_date = start + timedelta(days=i % 300)
+        end_date = start_date + timedelta(days=i % 60)
+        monthly_price = Decimal(1000 + i % 500)
+        # bulk_create pomija Rental.save(), więc koszt liczymy sami
+        cost = rental_cost(start_date, end_date, monthly_price)
+        return Rental(company=companies[i % companies_count], start_date=start_date, end_date=end_date,
+                      monthly_price=monthly_price, cost=cost)
+
+    Rental.objects.bulk_create((rental(i) for i in range(rentals_count)), batch_size=BATCH_SIZE)
+    ServiceHistory.objects.bulk_create((
+        ServiceHistory(trailer=trailers[i % trailers_count], service_date=start + timedelta(days=i % 365),
+                       description=f"Przegląd {i}", cost=Decimal(100 + i % 900))
+        for i in range(services_count)
+    ), batch_size=BATCH_SIZE)
+    WarehouseItem.objects.bulk_create((
+        WarehouseItem(name=f"Część {i}", quantity=i % 100, date_state=start + timedelta(days=i % 365))
+        for i in range(items_count)
+    ), batch_size=BATCH_SIZE)
+    return trailers_count + companies_count + rentals_count + services_count + items_count
+
+
+class Command(BaseCommand):
+    help = ("Mierzy liczbę zapytań i czas budowania raportu na syntetycznych danych "
+            "(tworzonych w transakcji, która jest na końcu wycofywana).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000,
+                            help="Liczba syntetycznych wierszy.")
+        parser.add_argument('--pdf', action='store_true',
+                            help="Renderuje też pełny PDF (domyślnie tylko HTML fragmentów).")
+        parser.add_argument('--processes', type=int, default=1,
+                            help="Liczba procesów renderujących PDF (z --pdf).")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                created = synthetic_dataset(options['rows'])
+                self.stdout.write(f"dane: {created} wierszy w {time.perf_counter() - started:.1f} s")
+                self.measure(options['pdf'], options['processes'])
+                raise Benchmark
+        except Benchmark:
+            pass
+
+    def measure(self, pdf, processes):
+        generated_on = timezone.now()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            parts = 0
+            if pdf:
+                with open(os.devnull, 'wb') as output:
+                    build_report(output, generated_on, processes=processes)
+            else:
+                for template_name, context in iter_report_parts(generated_on):
+                    get_template(template_name).render(context)
+                    parts += 1
+            elapsed = time.perf_counter() - started
+
+        summary = f"zapytania: {len(queries)}, czas: {elapsed:.1f} s"
+        if parts:
+            summary += f", fragmenty: {parts}"
+        self.stdout.write(summary)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from rentalapp.metrics import rebuild_metrics
+
+
+class Command(BaseCommand):
+    help = "Przelicza od zera metryki dashboardu i miesięczną liczbę wynajmów."
+
+    def handle(self, *args, **options):
+        metrics = rebuild_metrics()
+        self.stdout.write(
+            f"przyczepki: {metrics.total_trailers}, nieaktywne: {metrics.inactive_trailers}, "
+            f"mało na stanie: {metrics.items_below_5}, użytkownicy: {metrics.total_users}"
+        )
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from rentalapp import versions
+from rentalapp.models import Rental
+from rentalapp.pricing import RentalBatch, from_cents, to_cents
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = "Przelicza koszty wszystkich wynajmów silnikiem wsadowym i zapisuje tylko te, które się zmieniły."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Tylko pokazuje liczbę rozbieżności, niczego nie zapisuje.")
+
+    def handle(self, *args, **options):
+        checked = changed = 0
+        now = timezone.now()
+        last_id = 0
+        while True:
+            rows = list(
+                Rental.objects
+                .filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('id', 'company_id', 'start_date', 'end_date', 'monthly_price', 'cost')[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            batch = RentalBatch.from_rows(row[:5] for row in rows)
+            stale = [
+                Rental(pk=row[0], cost=from_cents(cost), updated_at=now)
+                for row, cost in zip(rows, batch.costs().tolist())
+                if row[5] is None or to_cents(row[5]) != cost
+            ]
+            checked += len(rows)
+            changed += len(stale)
+            if stale and not options['dry_run']:
+                Rental.objects.bulk_update(stale, ['cost', 'updated_at'], batch_size=500)
+
+        if changed and not options['dry_run']:
+            # bulk_update omija sygnały, więc wersję danych podbijamy ręcznie.
+            versions.bump('rental')
+        action = "do poprawy" if options['dry_run'] else "poprawiono"
+        self.stdout.write(f"sprawdzono: {checked}, {action}: {changed}")
@@ -0,0 +1,45 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from rentalapp.models import Company, Rental, RentalTrailer, Trailer
+from rentalapp.pricing import (
+    RentalBatch, costs_in_period, revenue_by_company, revenue_by_month, revenue_by_trailer,
+)
+
+
+class Command(BaseCommand):
+    help = "Przychód rozliczony na miesiące roku oraz największe przychody według firm i przyczepek."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=date.today().year)
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        year, top = options['year'], options['top']
+        first, last = date(year, 1, 1), date(year, 12, 31)
+        rentals = Rental.objects.filter(start_date__lte=last, end_date__gte=first)
+        batch = RentalBatch.from_rows(
+            rentals.values_list('id', 'company_id', 'start_date', 'end_date', 'monthly_price'))
+        costs = batch.costs()
+
+        self.stdout.write(f"Przychód rozliczony w {year} r.:")
+        by_month = revenue_by_month(batch, costs)
+        for month in range(1, 13):
+            self.stdout.write(f"  {year}-{month:02d}: {by_month.get(date(year, month, 1), 0):>14} zł")
+        self.stdout.write(f"  razem:   {sum(v for k, v in by_month.items() if k.year == year):>14} zł")
+
+        # firmy i przyczepki - tylko część kosztu rozliczona w tym roku, więc sumy zgadzają się z miesiącami
+        year_costs = costs_in_period(batch, first, last, costs)
+        by_company = revenue_by_company(batch, year_costs)
+        names = dict(Company.objects.filter(pk__in=by_company).values_list('pk', 'name'))
+        self.stdout.write("Firmy:")
+        for company_id, total in sorted(by_company.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f"  {names.get(company_id, company_id)}: {total} zł")
+
+        assignments = RentalTrailer.objects.filter(rental__in=rentals).values_list('rental_id', 'trailer_id')
+        by_trailer = revenue_by_trailer(batch, assignments, year_costs)
+        names = dict(Trailer.objects.filter(pk__in=by_trailer).values_list('pk', 'name'))
+        self.stdout.write("Przyczepki:")
+        for trailer_id, total in sorted(by_trailer.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f"  {names.get(trailer_id, trailer_id)}: {total} zł")
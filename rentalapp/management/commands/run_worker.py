@@ -0,0 +1,25 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from rentalapp.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Uruchamia proces roboczy wykonujący zadania okresowe (m.in. pingowanie przyczepek)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tick', type=float, default=None,
+                            help="Odstęp między sprawdzeniami harmonogramu [s].")
+
+    def handle(self, *args, **options):
+        worker = Worker(tick=options['tick'], log=self.stdout.write)
+
+        def shutdown(signum, frame):
+            self.stdout.write(f"Otrzymano sygnał {signal.Signals(signum).name}, zamykanie...")
+            worker.stop()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        worker.run()
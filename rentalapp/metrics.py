@@ -0,0 +1,80 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import (
+    DashboardMetrics, MonthlyRentalCount, Rental, Trailer, WarehouseItem,
+)
+
+METRICS_PK = 1
+LOW_STOCK_THRESHOLD = 5
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def trailer_counts():
+    return {
+        'total_trailers': Trailer.objects.count(),
+        'inactive_trailers': Trailer.objects.filter(status='inactive').count(),
+    }
+
+
+def rebuild_metrics():
+    """Pełne przeliczenie metryk dashboardu (komenda rebuild_dashboard_metrics i pierwszy odczyt)"""
+    with transaction.atomic():
+        metrics, _ = DashboardMetrics.objects.update_or_create(pk=METRICS_PK, defaults={
+            **trailer_counts(),
+            'items_below_5': WarehouseItem.objects.filter(quantity__lt=LOW_STOCK_THRESHOLD).count(),
+            'total_users': User.objects.count(),
+        })
+        MonthlyRentalCount.objects.all().delete()
+        MonthlyRentalCount.objects.bulk_create(
+            MonthlyRentalCount(month=entry['month'], count=entry['count'])
+            for entry in (
+                Rental.objects
+                .annotate(month=TruncMonth('start_date'))
+                .values('month')
+                .annotate(count=Count('id'))
+                .order_by('month')
+            )
+        )
+    return metrics
+
+
+def get_metrics():
+    """Zapisane metryki i seria miesięczna [(miesiąc, liczba)] - dwa proste zapytania"""
+    metrics = DashboardMetrics.objects.filter(pk=METRICS_PK).first() or rebuild_metrics()
+    monthly = list(MonthlyRentalCount.objects.filter(count__gt=0).order_by('month').values_list('month', 'count'))
+    return metrics, monthly
+
+
+def adjust(**deltas):
+    """Przyrostowa zmiana liczników, np. adjust(total_trailers=1) - atomowy UPDATE z F()"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = DashboardMetrics.objects.filter(pk=METRICS_PK).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}, updated_at=timezone.now())
+    if not updated:
+        # Brak wiersza - pełne przeliczenie już uwzględnia bieżącą zmianę.
+        rebuild_metrics()
+
+
+def adjust_month(day, delta):
+    if not DashboardMetrics.objects.filter(pk=METRICS_PK).exists():
+        rebuild_metrics()
+        return
+    month = month_start(day)
+    if delta > 0:
+        MonthlyRentalCount.objects.get_or_create(month=month)
+    MonthlyRentalCount.objects.filter(month=month).update(count=F('count') + delta)
+
+
+def refresh_trailer_counts():
+    """Przelicza liczniki przyczepek po zmianach zapisanych przez update() (bez sygnałów)"""
+    if not DashboardMetrics.objects.filter(pk=METRICS_PK).update(**trailer_counts(), updated_at=timezone.now()):
+        rebuild_metrics()
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0015_delete_report'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('owner', models.CharField(blank=True, default='', max_length=255)),
+                ('expires_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:25
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_rental_dates(apps, schema_editor):
+    Rental = apps.get_model('rentalapp', 'Rental')
+    RentalTrailer = apps.get_model('rentalapp', 'RentalTrailer')
+    rental = Rental.objects.filter(pk=OuterRef('rental_id'))
+    RentalTrailer.objects.update(
+        start_date=Subquery(rental.values('start_date')[:1]),
+        end_date=Subquery(rental.values('end_date')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0016_workerlease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rentaltrailer',
+            name='start_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='rentaltrailer',
+            name='end_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(copy_rental_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='rentaltrailer',
+            name='start_date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='rentaltrailer',
+            name='end_date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='rentaltrailer',
+            index=models.Index(fields=['trailer', 'start_date', 'end_date'], name='rentaltrailer_trailer_dates'),
+        ),
+        migrations.AddIndex(
+            model_name='rentaltrailer',
+            index=models.Index(fields=['end_date', 'start_date', 'trailer'], name='rentaltrailer_dates_trailer'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0017_rentaltrailer_booking_dates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trailerlog',
+            index=models.Index(fields=['timestamp'], name='trailerlog_timestamp'),
+        ),
+        migrations.AddIndex(
+            model_name='trailerlog',
+            index=models.Index(fields=['event_type', 'timestamp'], name='trailerlog_event_timestamp'),
+        ),
+        migrations.AddIndex(
+            model_name='trailerlog',
+            index=models.Index(fields=['trailer', 'timestamp'], name='trailerlog_trailer_timestamp'),
+        ),
+        migrations.AddIndex(
+            model_name='warehouselog',
+            index=models.Index(fields=['timestamp'], name='warehouselog_timestamp'),
+        ),
+    ]
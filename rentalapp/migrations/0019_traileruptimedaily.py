@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 17:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0018_log_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrailerUptimeDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('uptime_seconds', models.PositiveIntegerField(default=0)),
+                ('transitions', models.PositiveIntegerField(default=0)),
+                ('last_status', models.CharField(choices=[('active', 'Aktywna'), ('inactive', 'Nieaktywna'), ('maintenance', 'W serwisie')], max_length=20)),
+                ('trailer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uptime_days', to='rentalapp.trailer')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('trailer', 'date'), name='uptime_trailer_date_unique')],
+            },
+        ),
+    ]
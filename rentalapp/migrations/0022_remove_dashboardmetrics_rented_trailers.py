@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0021_dashboardmetrics_monthlyrentalcount'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='dashboardmetrics',
+            name='rented_trailers',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+from rentalapp.geo import encode
+
+
+def fill_geohash(apps, schema_editor):
+    Trailer = apps.get_model('rentalapp', 'Trailer')
+    trailers = list(Trailer.objects.exclude(latitude=None).exclude(longitude=None).only('latitude', 'longitude'))
+    for trailer in trailers:
+        trailer.geohash = encode(trailer.latitude, trailer.longitude)
+    Trailer.objects.bulk_update(trailers, ['geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0022_remove_dashboardmetrics_rented_trailers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trailer',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0024_updated_at_tombstone'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='status',
+            field=models.CharField(choices=[('queued', 'W kolejce'), ('running', 'W trakcie'), ('done', 'Gotowy'), ('failed', 'Błąd'), ('expired', 'Wygasł')], db_index=True, default='queued', max_length=20),
+        ),
+    ]
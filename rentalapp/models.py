@@ -2,6 +2,8 @@ from django.contrib.auth.models import User
 from django.db import models
 from django.utils.timezone import now
 
+from . import geo, pricing, versions
+
 
 class Trailer(models.Model):
     name = models.CharField(max_length=100)
@@ -13,6 +15,8 @@ class Trailer(models.Model):
     notes = models.TextField(blank=True, null=True)
     latitude = models.FloatField(blank=True, null=True)
     longitude = models.FloatField(blank=True, null=True)
+    # Geohash współrzędnych - indeks przestrzenny (zapytania prefiksem = zakres na indeksie).
+    geohash = models.CharField(max_length=12, blank=True, default="", db_index=True, editable=False)
 
     STATUS_CHOICES = [
         ('active', 'Aktywna'),
@@ -20,6 +24,18 @@ class Trailer(models.Model):
         ('maintenance', 'W serwisie')
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    # Czas ostatniej zmiany - podstawa synchronizacji przyrostowej (/sync/).
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def save(self, *args, **kwargs):
+        has_location = self.latitude is not None and self.longitude is not None
+        self.geohash = geo.encode(self.latitude, self.longitude) if has_location else ""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # auto_now nie dopisuje się sam do update_fields
+            extra = {'geohash'} if {'latitude', 'longitude'} & set(update_fields) else set()
+            kwargs['update_fields'] = {*update_fields, *extra, 'updated_at'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -29,6 +45,7 @@ class Company(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField(blank=True, null=True)
     phone = models.CharField(max_length=30, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -42,12 +59,18 @@ class Rental(models.Model):
     monthly_price = models.DecimalField(max_digits=10, decimal_places=2)
     cost = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def save(self, *args, **kwargs):
-        days = (self.end_date - self.start_date).days + 1
-        daily_rate = self.monthly_price / 30
-        self.cost = round(days * daily_rate, 2)
+        self.cost = pricing.rental_cost(self.start_date, self.end_date, self.monthly_price)
         super().save(*args, **kwargs)
+        # Terminy są zdenormalizowane w RentalTrailer (indeks rezerwacji) - utrzymujemy je w zgodzie.
+        moved = (self.rental_trailers
+                 .exclude(start_date=self.start_date, end_date=self.end_date)
+                 .update(start_date=self.start_date, end_date=self.end_date, updated_at=self.updated_at))
+        if moved:
+            # update() omija sygnały, więc wersję danych podbijamy ręcznie.
+            versions.bump('rentaltrailer')
 
     def __str__(self):
         return f"Wynajem #{self.id} - {self.company.name}"
@@ -56,6 +79,21 @@ class Rental(models.Model):
 class RentalTrailer(models.Model):
     rental = models.ForeignKey(Rental, on_delete=models.CASCADE, related_name='rental_trailers')
     trailer = models.ForeignKey(Trailer, on_delete=models.CASCADE)
+    # Kopia terminów wynajmu - pozwala sprawdzać kolizje bez złączenia z Rental.
+    start_date = models.DateField(editable=False)
+    end_date = models.DateField(editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['trailer', 'start_date', 'end_date'], name='rentaltrailer_trailer_dates'),
+            models.Index(fields=['end_date', 'start_date', 'trailer'], name='rentaltrailer_dates_trailer'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.start_date = self.rental.start_date
+        self.end_date = self.rental.end_date
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.trailer.name} (Rental #{self.rental.id})"
@@ -85,15 +123,40 @@ class TrailerLog(models.Model):
     event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES)
     message = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp'], name='trailerlog_timestamp'),
+            models.Index(fields=['event_type', 'timestamp'], name='trailerlog_event_timestamp'),
+            models.Index(fields=['trailer', 'timestamp'], name='trailerlog_trailer_timestamp'),
+        ]
+
     def __str__(self):
         return f"{self.get_event_type_display()} - {self.trailer.name if self.trailer else 'Usunięta przyczepka'} ({self.timestamp})"
 
 
+class TrailerUptimeDaily(models.Model):
+    """Dzienne podsumowanie pingów przyczepki (surowe logi 'ping' są potem usuwane)"""
+    trailer = models.ForeignKey(Trailer, on_delete=models.CASCADE, related_name='uptime_days')
+    date = models.DateField()
+    uptime_seconds = models.PositiveIntegerField(default=0)
+    transitions = models.PositiveIntegerField(default=0)
+    last_status = models.CharField(max_length=20, choices=Trailer.STATUS_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['trailer', 'date'], name='uptime_trailer_date_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.trailer.name} {self.date}: {self.uptime_seconds} s"
+
+
 class WarehouseItem(models.Model):
     name = models.CharField(max_length=100)
     quantity = models.PositiveIntegerField(default=0)
     date_state = models.DateField()
     comment = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -106,6 +169,11 @@ class WarehouseLog(models.Model):
     quantity_taken = models.IntegerField(default=0)
     message = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp'], name='warehouselog_timestamp'),
+        ]
+
     def __str__(self):
         return f"{self.user.username if self.user else 'System'}: {self.message}"
 
@@ -119,3 +187,70 @@ class RentalHistory(models.Model):
 
     def __str__(self):
         return f"{self.date} - {self.rental} - {self.description}"
+
+
+class WorkerLease(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    owner = models.CharField(max_length=255, blank=True, default="")
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.owner or '-'} do {self.expires_at}"
+
+
+class ReportJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'W kolejce'),
+        ('running', 'W trakcie'),
+        ('done', 'Gotowy'),
+        ('failed', 'Błąd'),
+        ('expired', 'Wygasł'),
+    ]
+
+    key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', db_index=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    file_path = models.CharField(max_length=500, blank=True, default="")
+    error = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"Raport #{self.id} ({self.get_status_display()})"
+
+
+class DashboardMetrics(models.Model):
+    """Jeden wiersz (pk=1) z licznikami dashboardu - aktualizowany przyrostowo przez sygnały"""
+    total_trailers = models.IntegerField(default=0)
+    inactive_trailers = models.IntegerField(default=0)
+    items_below_5 = models.IntegerField(default=0)
+    total_users = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Metryki dashboardu ({self.updated_at})"
+
+
+class MonthlyRentalCount(models.Model):
+    """Liczba wynajmów rozpoczętych w danym miesiącu (month = pierwszy dzień miesiąca)"""
+    month = models.DateField(unique=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}: {self.count}"
+
+
+class Tombstone(models.Model):
+    """Ślad po usuniętym obiekcie - /sync/ przekazuje klientom, co mają skasować u siebie"""
+    model = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_at_id'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} usunięty {self.deleted_at}"
@@ -0,0 +1,211 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from rentalapp.models import Company, Rental, ServiceHistory, Trailer, TrailerLog, WarehouseItem
+from rentalapp.pagination import apaginate
+from rentalapp.sync import CursorExpired, changes_since, sync_settings
+from rentalapp.versions import version_key
+
+
+@dataclass
+class ApiResource:
+    """
+    Zasób API: model, pola do wyboru przez ?fields=, filtry (?parametr= -> lookup),
+    sortowanie dla stronicowania kluczem oraz wersje danych, od których zależy
+    (signals.py) - z nich liczymy ETag bez zapytania do bazy. Bez wersji ETag
+    jest skrótem treści odpowiedzi.
+    """
+    model: type
+    fields: list
+    ordering: list = field(default_factory=lambda: ['id'])
+    filters: dict = field(default_factory=dict)
+    depends_on: list = None
+
+
+def api_login_required(view):
+    """Jak login_required, ale zamiast przekierowania na logowanie zwraca JSON 401"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({'error': "Wymagane zalogowanie."}, status=401)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+class ApiViews:
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 1000
+    RESOURCES = {
+        'trailers': ApiResource(
+            Trailer,
+            ['id', 'name', 'status', 'serial_number', 'registration_number', 'ip_address',
+             'operator_phone', 'location_link', 'latitude', 'longitude', 'notes'],
+            filters={'status': 'status'},
+            depends_on=['trailer'],
+        ),
+        'rentals': ApiResource(
+            Rental,
+            ['id', 'name', 'company_id', 'start_date', 'end_date', 'monthly_price', 'cost', 'created_at'],
+            filters={'company': 'company_id'},
+            depends_on=['rental'],
+        ),
+        'companies': ApiResource(
+            Company,
+            ['id', 'name', 'email', 'phone'],
+            depends_on=['company'],
+        ),
+        'service-history': ApiResource(
+            ServiceHistory,
+            ['id', 'trailer_id', 'service_date', 'description', 'cost'],
+            filters={'trailer': 'trailer_id'},
+            depends_on=['servicehistory'],
+        ),
+        'trailer-logs': ApiResource(
+            TrailerLog,
+            ['id', 'timestamp', 'trailer_id', 'event_type', 'message'],
+            ordering=['-timestamp', '-id'],
+            filters={'trailer': 'trailer_id', 'event_type': 'event_type'},
+        ),
+        'warehouse-items': ApiResource(
+            WarehouseItem,
+            ['id', 'name', 'quantity', 'date_state', 'comment'],
+            depends_on=['warehouseitem'],
+        ),
+    }
+
+    @staticmethod
+    def error(message, status):
+        return JsonResponse({'error': message}, status=status)
+
+    @staticmethod
+    def selected_fields(request, resource):
+        """?fields=id,name - tylko wybrane pola (id zawsze); ValueError dla nieznanych"""
+        requested = [name.strip() for name in request.GET.get('fields', '').split(',') if name.strip()]
+        if not requested:
+            return resource.fields
+        unknown = [name for name in requested if name not in resource.fields]
+        if unknown:
+            raise ValueError(f"Nieznane pola: {', '.join(unknown)}")
+        return ['id'] + [name for name in requested if name != 'id']
+
+    @staticmethod
+    async def version_etag(request, resource):
+        """ETag z wersji danych i adresu - zmienia się dopiero po zapisie modelu"""
+        if resource.depends_on is None:
+            return None
+        version = await sync_to_async(version_key)(*resource.depends_on)
+        raw = f"{version}|{request.get_full_path()}"
+        return f'"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+    @staticmethod
+    def not_modified(request, etag):
+        """304 przy zgodnym If-None-Match - sprawdzane przed zapytaniem do bazy"""
+        if etag is None:
+            return None
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            response['ETag'] = etag
+        return response
+
+    @staticmethod
+    def json_response(request, data, etag=None):
+        """
+        Odpowiedź z ETagiem (podanym albo ze skrótu treści); przy zgodnym
+        If-None-Match - 304 bez treści. Kompresję gzip dokłada gzip_page w views.py.
+        """
+        body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+        etag = etag or f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        response = ApiViews.not_modified(request, etag) or HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @staticmethod
+    async def list(request, name):
+        """
+        Lista zasobu: ?fields=, filtry zasobu, ?limit= (do MAX_LIMIT) i ?cursor=
+        z pola "next" poprzedniej strony.
+        """
+        resource = ApiViews.RESOURCES.get(name)
+        if resource is None:
+            return ApiViews.error("Nieznany zasób.", 404)
+        try:
+            fields = ApiViews.selected_fields(request, resource)
+        except ValueError as error:
+            return ApiViews.error(str(error), 400)
+        try:
+            limit = max(1, min(int(request.GET.get('limit') or ApiViews.DEFAULT_LIMIT), ApiViews.MAX_LIMIT))
+            queryset = resource.model.objects.filter(**{
+                lookup: request.GET[param] for param, lookup in resource.filters.items() if request.GET.get(param)
+            })
+        except ValueError:
+            return ApiViews.error("Niepoprawny limit lub wartość filtra.", 400)
+
+        etag = await ApiViews.version_etag(request, resource)
+        not_modified = ApiViews.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        # pola sortowania są potrzebne do kursora, nawet jeśli klient ich nie wybrał
+        keys = [key.lstrip('-') for key in resource.ordering]
+        page = await apaginate(
+            queryset.values(*dict.fromkeys(fields + keys)),
+            resource.ordering,
+            cursor=request.GET.get('cursor'),
+            per_page=limit,
+        )
+
+        next_url = None
+        if page.has_next:
+            query = request.GET.copy()
+            query['cursor'] = page.next_cursor
+            next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+        return ApiViews.json_response(request, {
+            'results': [{column: row[column] for column in fields} for row in page],
+            'next': next_url,
+        }, etag)
+
+    @staticmethod
+    async def detail(request, name, pk):
+        resource = ApiViews.RESOURCES.get(name)
+        if resource is None:
+            return ApiViews.error("Nieznany zasób.", 404)
+        try:
+            fields = ApiViews.selected_fields(request, resource)
+        except ValueError as error:
+            return ApiViews.error(str(error), 400)
+
+        etag = await ApiViews.version_etag(request, resource)
+        not_modified = ApiViews.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        row = await resource.model.objects.filter(pk=pk).values(*fields).afirst()
+        if row is None:
+            return ApiViews.error("Nie znaleziono.", 404)
+        return ApiViews.json_response(request, row, etag)
+
+    @staticmethod
+    async def sync(request):
+        """
+        Zmiany od ?since= (kursor z poprzedniej odpowiedzi): zmienione i dodane wiersze
+        oraz identyfikatory usuniętych. Bez ?since= - pełny stan. Przy "has_more"
+        klient od razu pyta ponownie z nowym kursorem; 410 oznacza, że musi zacząć od zera.
+        """
+        config = sync_settings()
+        try:
+            limit = max(1, min(int(request.GET.get('limit') or config['PAGE_SIZE']), config['MAX_PAGE_SIZE']))
+            data = await changes_since(request.GET.get('since'), limit)
+        except CursorExpired:
+            return JsonResponse({'error': "Kursor wygasł - wymagana pełna synchronizacja.", 'reset': True}, status=410)
+        except ValueError as error:
+            return ApiViews.error(str(error) or "Niepoprawny limit.", 400)
+        return ApiViews.json_response(request, data)
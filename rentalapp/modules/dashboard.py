@@ -1,42 +1,61 @@
 import json
+from datetime import timedelta
+
 from django.shortcuts import render
-from django.contrib.auth.models import User
-from rentalapp.models import Trailer, WarehouseItem, Rental, RentalTrailer
+from django.utils import timezone
+
+from rentalapp.caching import cached
+from rentalapp.metrics import get_metrics
+from rentalapp.models import Trailer
+from rentalapp.utilization import fleet_utilization
 
 
 class DashboardViews:
+    UTILIZATION_DAYS = 90
+    IDLE_TRAILERS_LIMIT = 10
+    # Liczniki czytamy z DashboardMetrics przy każdym żądaniu (dwa proste zapytania),
+    # a kosztowne wyliczenie zajętości w NumPy - z cache zależnego tylko od wynajmów i floty.
+    UTILIZATION_DEPENDENCIES = ['trailer', 'rental', 'rentaltrailer']
+
     @staticmethod
-    def dashboard_view(request):
-        from django.db.models.functions import TruncMonth
-        from django.db.models import Count
-
-        total_trailers = Trailer.objects.count()
-        inactive_trailers = Trailer.objects.filter(status='inactive').count()
-        items_below_5 = WarehouseItem.objects.filter(quantity__lt=5).count()
-        total_users = User.objects.count()
-
-        monthly_data = (
-            Rental.objects
-            .annotate(month=TruncMonth('start_date'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
-        months = [entry['month'].strftime('%Y-%m') for entry in monthly_data]
-        rental_counts = [entry['count'] for entry in monthly_data]
-
-        rented_trailer_ids = RentalTrailer.objects.values_list('trailer_id', flat=True).distinct()
-        rented_count = Trailer.objects.filter(id__in=rented_trailer_ids).count()
-        free_count = Trailer.objects.exclude(id__in=rented_trailer_ids).count()
-
-        context = {
-            'total_trailers': total_trailers,
-            'inactive_trailers': inactive_trailers,
-            'items_below_5': items_below_5,
-            'total_users': total_users,
-            'months': json.dumps(months),
-            'rental_counts': json.dumps(rental_counts),
-            'trailer_status_counts': json.dumps([rented_count, free_count]),
+    def metrics_data():
+        metrics, monthly = get_metrics()
+        return {
+            'total_trailers': metrics.total_trailers,
+            'inactive_trailers': metrics.inactive_trailers,
+            'items_below_5': metrics.items_below_5,
+            'total_users': metrics.total_users,
+            'months': json.dumps([month.strftime('%Y-%m') for month, _ in monthly]),
+            'rental_counts': json.dumps([count for _, count in monthly]),
         }
 
-        return render(request, 'rentalapp/dashboard.html', context)
+    @staticmethod
+    def utilization_data(today):
+        utilization = fleet_utilization(today - timedelta(days=DashboardViews.UTILIZATION_DAYS - 1), today)
+        rented_today = utilization.rented_on(today)
+        daily_rates = utilization.daily_rates()
+
+        most_idle = utilization.most_idle(DashboardViews.IDLE_TRAILERS_LIMIT)
+        names = dict(Trailer.objects.filter(pk__in=[pk for pk, _ in most_idle]).values_list('pk', 'name'))
+
+        return {
+            'trailer_status_counts': json.dumps([rented_today, utilization.fleet_size - rented_today]),
+            'utilization_today': utilization.rate(last_days=1),
+            'utilization_week': utilization.rate(last_days=7),
+            'utilization_month': utilization.rate(last_days=30),
+            'utilization_days': DashboardViews.UTILIZATION_DAYS,
+            'utilization_labels': json.dumps([utilization.day(i).isoformat() for i in range(utilization.days)]),
+            'utilization_rates': json.dumps([round(rate, 1) for rate in daily_rates.tolist()]),
+            'idle_trailers': [(pk, names.get(pk, pk), days) for pk, days in most_idle],
+        }
+
+    @staticmethod
+    def dashboard_view(request):
+        today = timezone.localdate()
+        utilization = cached(
+            'dashboard-utilization',
+            DashboardViews.UTILIZATION_DEPENDENCIES,
+            lambda: DashboardViews.utilization_data(today),
+            parts=(today,),
+        )
+        return render(request, 'rentalapp/dashboard.html', {**DashboardViews.metrics_data(), **utilization})
@@ -1,29 +1,86 @@
+from datetime import datetime, time, timedelta
+
 from django.shortcuts import render, get_object_or_404
+from django.utils import timezone
+from django.utils.timezone import localtime
+
+from rentalapp.exports import csv_export, date_param
 from rentalapp.models import TrailerLog, WarehouseLog, Trailer
+from rentalapp.pagination import paginate
 
 
 class LogsViews:
+    LOGS_PER_PAGE = 100
+    TRAILER_LOGS_LIMIT = 100
+
     @staticmethod
-    def logs_view(request):
+    def date_range_filter(request, field):
+        """Filtr ?date_from=&date_to= (daty włącznie) jako zakres na indeksowanej kolumnie"""
+        date_from = date_param(request, 'date_from')
+        date_to = date_param(request, 'date_to')
+        lookups = {}
+        if date_from:
+            lookups[f'{field}__gte'] = timezone.make_aware(datetime.combine(date_from, time.min))
+        if date_to:
+            lookups[f'{field}__lt'] = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        return lookups, date_from, date_to
+
+    @staticmethod
+    def filtered_logs(request):
+        """Logi przyczepek według filtrów z GET (typ, przyczepka, daty) oraz wartości tych filtrów"""
         event_type = request.GET.get('event_type')
+        if event_type not in dict(TrailerLog.EVENT_TYPE_CHOICES):
+            event_type = None
+        trailer_id = request.GET.get('trailer')
+        trailer_id = int(trailer_id) if trailer_id and trailer_id.isdigit() else None
+        date_lookups, date_from, date_to = LogsViews.date_range_filter(request, 'timestamp')
 
+        logs = TrailerLog.objects.filter(**date_lookups)
         if event_type:
-            logs = TrailerLog.objects.filter(event_type=event_type).order_by('-timestamp')
-        else:
-            logs = TrailerLog.objects.all().order_by('-timestamp')
+            logs = logs.filter(event_type=event_type)
+        if trailer_id:
+            logs = logs.filter(trailer_id=trailer_id)
+        return logs, {
+            'selected_type': event_type,
+            'selected_trailer': trailer_id,
+            'date_from': date_from,
+            'date_to': date_to,
+        }
 
-        event_types = TrailerLog.objects.values_list('event_type', flat=True).distinct()
+    @staticmethod
+    def logs_view(request):
+        logs, filters = LogsViews.filtered_logs(request)
+        page = paginate(
+            logs.select_related('trailer'),
+            ['-timestamp', '-id'],
+            cursor=request.GET.get('cursor'),
+            per_page=LogsViews.LOGS_PER_PAGE,
+        )
 
         return render(request, 'rentalapp/log.html', {
-            'logs': logs,
-            'event_types': event_types,
-            'selected_type': event_type
+            'logs': page.object_list,
+            'page': page,
+            'event_types': TrailerLog.EVENT_TYPE_CHOICES,
+            'trailers': Trailer.objects.only('id', 'name').order_by('name'),
+            **filters,
         })
 
+    @staticmethod
+    def logs_export(request):
+        logs, _ = LogsViews.filtered_logs(request)
+        event_labels = dict(TrailerLog.EVENT_TYPE_CHOICES)
+        return csv_export(
+            'logi-przyczepek',
+            ['Data', 'Typ zdarzenia', 'Przyczepka', 'Wiadomość'],
+            logs.order_by('-timestamp', '-id').values_list('timestamp', 'event_type', 'trailer__name', 'message'),
+            lambda row: (localtime(row[0]).strftime('%Y-%m-%d %H:%M:%S'), event_labels.get(row[1], row[1]),
+                         row[2] or '', row[3]),
+        )
+
     @staticmethod
     def trailer_logs(request, pk):
         trailer = get_object_or_404(Trailer, pk=pk)
-        trailer_logs = trailer.logs.all().order_by('-timestamp')
+        trailer_logs = trailer.logs.order_by('-timestamp', '-id')[:LogsViews.TRAILER_LOGS_LIMIT]
         return render(request, 'rentalapp/trailer/trailer_logs_partial.html', {
             'trailer': trailer,
             'trailer_logs': trailer_logs
@@ -31,5 +88,30 @@ class LogsViews:
 
     @staticmethod
     def warehouse_logs_view(request):
-        logs = WarehouseLog.objects.all().order_by('-timestamp')
-        return render(request, 'rentalapp/warehouse/warehouse_logs.html', {'logs': logs})
+        date_lookups, date_from, date_to = LogsViews.date_range_filter(request, 'timestamp')
+        logs = WarehouseLog.objects.select_related('item', 'user').filter(**date_lookups)
+        page = paginate(
+            logs,
+            ['-timestamp', '-id'],
+            cursor=request.GET.get('cursor'),
+            per_page=LogsViews.LOGS_PER_PAGE,
+        )
+        return render(request, 'rentalapp/warehouse/warehouse_logs.html', {
+            'logs': page.object_list,
+            'page': page,
+            'date_from': date_from,
+            'date_to': date_to,
+        })
+
+    @staticmethod
+    def warehouse_logs_export(request):
+        date_lookups, _, _ = LogsViews.date_range_filter(request, 'timestamp')
+        return csv_export(
+            'logi-magazynu',
+            ['Data', 'Użytkownik', 'Przedmiot', 'Zmiana ilości', 'Wiadomość'],
+            (WarehouseLog.objects
+             .filter(**date_lookups)
+             .order_by('-timestamp', '-id')
+             .values_list('timestamp', 'user__username', 'item__name', 'quantity_taken', 'message')),
+            lambda row: (localtime(row[0]).strftime('%Y-%m-%d %H:%M:%S'), row[1] or '', row[2] or '', row[3], row[4]),
+        )
@@ -1,15 +1,117 @@
+import math
+from functools import reduce
+
+from django.db.models import Avg, Count, Min, Q
+from django.db.models.functions import Substr
+from django.http import JsonResponse
 from django.shortcuts import render
+
+from rentalapp import events, geo
+from rentalapp.caching import cached
 from rentalapp.models import Trailer
 
 
 class MapViews:
+    CLUSTER_BELOW_ZOOM = 12
+    MAX_POINTS = 1000
+
     @staticmethod
     def map_view(request):
-        trailers = Trailer.objects.exclude(latitude=None).exclude(longitude=None).values('id','name', 'latitude', 'longitude')
-        total_trailers = Trailer.objects.count()
+        total_trailers = cached('map', ['trailer'], Trailer.objects.count)
+        return render(request, 'rentalapp/map_leaflet.html', {
+            'total_trailers': total_trailers,
+            'status_labels': dict(Trailer.STATUS_CHOICES),
+            'live_events': events.live_events_enabled(request),
+        })
+
+    @staticmethod
+    def parse_bbox(request):
+        """?bbox=zachód,południe,wschód,północ (jak L.LatLngBounds.toBBoxString()) oraz ?zoom="""
+        try:
+            west, south, east, north = (float(value) for value in request.GET['bbox'].split(','))
+            zoom = int(request.GET.get('zoom', MapViews.CLUSTER_BELOW_ZOOM))
+        except (KeyError, ValueError):
+            return None, None
+        if not all(math.isfinite(value) for value in (west, south, east, north)):
+            return None, None
+        return geo.clamp_bbox(west, south, east, north), zoom
+
+    @staticmethod
+    def trailers_in_bbox(bbox):
+        """Przyczepki w prostokącie: najpierw prefiksy geohash (indeks), potem dokładny filtr współrzędnych"""
+        trailers = Trailer.objects.exclude(geohash="")
+        if bbox is None:
+            return trailers
+        trailers = trailers.filter(reduce(
+            lambda left, right: left | right,
+            (Q(geohash__range=geo.prefix_range(prefix)) for prefix in geo.cover(bbox)),
+        ))
+        in_box = Q()
+        for west, south, east, north in geo.split_antimeridian(bbox):
+            in_box |= Q(latitude__range=(south, north), longitude__range=(west, east))
+        return trailers.filter(in_box)
 
-        context = {
-            'trailers_json': list(trailers),
-            'total_trailers': total_trailers
+    @staticmethod
+    def point_feature(latitude, longitude, properties):
+        return {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [longitude, latitude]},
+            'properties': properties,
         }
-        return render(request, 'rentalapp/map_leaflet.html', context)
+
+    @staticmethod
+    def clusters(trailers, zoom):
+        """Grupy przyczepek o wspólnym prefiksie geohash - środek grupy to średnia współrzędnych"""
+        groups = (
+            trailers
+            .annotate(cell=Substr('geohash', 1, geo.cluster_precision(zoom)))
+            .values('cell')
+            .annotate(
+                count=Count('id'),
+                lat=Avg('latitude'),
+                lon=Avg('longitude'),
+                first_id=Min('id'),
+                first_name=Min('name'),
+                first_status=Min('status'),
+            )
+            .order_by()
+        )
+        features = []
+        for group in groups:
+            if group['count'] == 1:
+                properties = {
+                    'cluster': False,
+                    'id': group['first_id'],
+                    'name': group['first_name'],
+                    'status': group['first_status'],
+                }
+            else:
+                properties = {'cluster': True, 'count': group['count']}
+            features.append(MapViews.point_feature(group['lat'], group['lon'], properties))
+        return features
+
+    @staticmethod
+    def map_trailers(request):
+        """GeoJSON przyczepek widocznych na mapie; przy małym powiększeniu albo dużej liczbie - zgrupowane"""
+        bbox, zoom = MapViews.parse_bbox(request)
+        if zoom is None:
+            return JsonResponse({'error': "Wymagany parametr bbox=zachód,południe,wschód,północ"}, status=400)
+        trailers = MapViews.trailers_in_bbox(bbox)
+
+        features = None
+        if zoom >= MapViews.CLUSTER_BELOW_ZOOM:
+            points = list(trailers.values('id', 'name', 'status', 'latitude', 'longitude')[:MapViews.MAX_POINTS + 1])
+            if len(points) <= MapViews.MAX_POINTS:
+                features = [
+                    MapViews.point_feature(point['latitude'], point['longitude'], {
+                        'cluster': False,
+                        'id': point['id'],
+                        'name': point['name'],
+                        'status': point['status'],
+                    })
+                    for point in points
+                ]
+        if features is None:
+            features = MapViews.clusters(trailers, zoom)
+
+        return JsonResponse({'type': 'FeatureCollection', 'features': features})
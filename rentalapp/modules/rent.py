@@ -1,13 +1,35 @@
+import json
+import re
+from decimal import Decimal
+
 from django.contrib import messages
-from django.db.models import Q, Sum
+from django.db.models import Count, DecimalField, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
+from django.utils import timezone
 
+from rentalapp import geo
+from rentalapp.assignment import MAX_BULK_TRAILERS, REJECT_REASONS, assign_trailers, pick_free_trailers
+from rentalapp.availability import available_trailers_for
+from rentalapp.caching import cached
+from rentalapp.exports import csv_export, date_filter
 from rentalapp.forms import RentalForm, CompanyForm
 from rentalapp.models import Company, Rental, RentalTrailer, RentalHistory, Trailer
+from rentalapp.pagination import cursor_values, paginate
+from rentalapp.spatial import nearest_trailers
 
 
 class RentViews:
+    COMPANIES_PER_PAGE = 50
+    NEAREST_LIMIT = 50
+    COMPANY_SORT_FIELDS = {
+        'name': 'name',
+        'rentals': 'total_rentals',
+        'income': 'total_income',
+    }
+
     @staticmethod
     def company_rent_detail(request, pk):
         company = get_object_or_404(Company, pk=pk)
@@ -43,36 +65,19 @@ class RentViews:
 
             elif 'trailer_id' in request.POST:
                 trailer_id = (request.POST.get('trailer_id') or '').strip()
-                if not trailer_id:
+                if not trailer_id.isdigit():
                     messages.error(request, "Nie wybrano przyczepki.")
                     return redirect('rentalapp:company_rent_detail', pk=company.pk)
 
-                collision_exists = RentalTrailer.objects.filter(
-                    trailer_id=trailer_id,
-                    rental__start_date__lte=rental.end_date,
-                    rental__end_date__gte=rental.start_date,
-                ).exists()
-
-                if collision_exists:
-                    messages.error(
-                        request,
-                        "Ta przyczepka jest już przypisana do innego wynajmu w tym terminie."
-                    )
+                result = assign_trailers(rental, [int(trailer_id)], user=request.user)
+                if result.accepted:
+                    messages.success(request, "Przyczepka została dodana do wynajmu.")
                 else:
-                    already_in_this = RentalTrailer.objects.filter(
-                        rental=rental, trailer_id=trailer_id
-                    ).exists()
-                    if already_in_this:
-                        messages.info(request, "Ta przyczepka jest już w tym wynajmie.")
-                    else:
-                        RentalTrailer.objects.create(rental=rental, trailer_id=trailer_id)
-                        trailer = get_object_or_404(Trailer, id=trailer_id)
-                        RentalHistory.objects.create(
-                            rental=rental,
-                            description=f"Przyczepka {trailer.name} została dodana do wynajmu.",
-                            user=request.user,
-                        )
-                        messages.success(request, "Przyczepka została dodana do wynajmu.")
+                    reason = result.rejected[int(trailer_id)]
+                    if reason == 'unknown':
+                        raise Http404(REJECT_REASONS[reason])
+                    level = messages.info if reason == 'already_assigned' else messages.error
+                    level(request, REJECT_REASONS[reason])
 
                 return redirect('rentalapp:company_rent_detail', pk=company.pk)
 
@@ -91,27 +96,131 @@ class RentViews:
                 messages.error(request, "Nie rozpoznano akcji formularza.")
                 return redirect('rentalapp:company_rent_detail', pk=company.pk)
 
+        rentals = list(rentals)
+        available = available_trailers_for(rentals)
+        site = geo.parse_point(request.GET.get('near'))
+        distances = {}
+        if site:
+            candidates = {trailer.id for trailers in available.values() for trailer in trailers}
+            distances = dict(nearest_trailers(
+                *site, k=RentViews.NEAREST_LIMIT, accept=lambda ids: candidates.intersection(ids)))
         for rental in rentals:
-            overlapping = Rental.objects.filter(
-                Q(start_date__lte=rental.end_date) & Q(end_date__gte=rental.start_date)
-            ).exclude(id=rental.id)
-
-            rented_elsewhere_ids = RentalTrailer.objects.filter(
-                rental__in=overlapping
-            ).values_list('trailer_id', flat=True)
-
-            current_rental_ids = rental.rental_trailers.values_list('trailer_id', flat=True)
-
-            blocked_ids = list(set(rented_elsewhere_ids) | set(current_rental_ids))
-
-            rental.available_trailers = Trailer.objects.exclude(id__in=blocked_ids).order_by('name')
+            trailers = available[rental.id]
+            if site:
+                # Najbliższe miejscu wynajmu na początku listy, pozostałe alfabetycznie.
+                for trailer in trailers:
+                    trailer.distance_km = distances.get(trailer.id)
+                trailers = sorted(trailers, key=lambda trailer: (trailer.distance_km is None, trailer.distance_km or 0))
+            rental.available_trailers = trailers
 
         return render(
             request,
             'rentalapp/rent/company_rent_detail.html',
-            {'company': company, 'rentals': rentals},
+            {
+                'company': company,
+                'rentals': rentals,
+                'near': request.GET.get('near', '') if site else '',
+                'trailer_statuses': Trailer.STATUS_CHOICES,
+            },
         )
 
+    @staticmethod
+    def whole_number(value):
+        """Nieujemna liczba całkowita z JSON-a lub formularza - 1.5, true czy "1.5" to błąd, a nie obcięcie"""
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(value)
+        if isinstance(value, str) and not value.strip().isdigit():
+            raise ValueError(value)
+        value = int(value)
+        if value < 0:
+            raise ValueError(value)
+        return value
+
+    @staticmethod
+    def bulk_assign_request(request):
+        """
+        Parametry zbiorczego przypisania z formularza albo z JSON-a: lista ``trailer_ids``
+        albo ``count`` z opcjonalnymi filtrami ``status`` i ``near`` (szer.,dł.).
+        """
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                raise ValueError("Niepoprawny JSON.")
+            if not isinstance(data, dict):
+                raise ValueError("Oczekiwano obiektu JSON.")
+            ids = data.get('trailer_ids') or []
+            if isinstance(ids, str):
+                ids = re.findall(r'\d+', ids)
+            elif not isinstance(ids, list):
+                raise ValueError("Niepoprawne identyfikatory przyczepek lub liczba.")
+        else:
+            data = request.POST
+            ids = [value for text in data.getlist('trailer_ids') for value in re.findall(r'\d+', text)]
+
+        try:
+            trailer_ids = [RentViews.whole_number(value) for value in ids]
+            count = RentViews.whole_number(data.get('count') or 0)
+        except ValueError:
+            raise ValueError("Niepoprawne identyfikatory przyczepek lub liczba.")
+        status = data.get('status') or None
+        if status and status not in dict(Trailer.STATUS_CHOICES):
+            raise ValueError(f"Nieznany status: {status}")
+        near = None
+        if data.get('near'):
+            near = geo.parse_point(data.get('near'))
+            if near is None:
+                raise ValueError("Niepoprawne współrzędne miejsca wynajmu.")
+
+        if not trailer_ids and count <= 0:
+            raise ValueError("Podaj identyfikatory przyczepek albo ich liczbę.")
+        if trailer_ids and count:
+            raise ValueError("Podaj identyfikatory przyczepek albo ich liczbę, nie jedno i drugie.")
+        if len(trailer_ids) > MAX_BULK_TRAILERS or count > MAX_BULK_TRAILERS:
+            raise ValueError(f"Jednorazowo można przypisać najwyżej {MAX_BULK_TRAILERS} przyczepek.")
+        return trailer_ids, count, status, near
+
+    @staticmethod
+    def bulk_assign_trailers(request, pk):
+        """
+        Przypisuje wiele przyczepek do wynajmu w jednym żądaniu (POST). Odpowiada
+        JSON-em z przyjętymi i odrzuconymi przyczepkami, jeśli żądanie było w JSON-ie
+        albo o niego prosi; z formularza wraca na stronę firmy z komunikatem.
+        """
+        rental = get_object_or_404(Rental, pk=pk)
+        wants_json = request.content_type == 'application/json' or (
+            request.accepts('application/json') and not request.accepts('text/html'))
+        try:
+            trailer_ids, count, status, near = RentViews.bulk_assign_request(request)
+        except ValueError as error:
+            if wants_json:
+                return JsonResponse({'error': str(error)}, status=400)
+            messages.error(request, str(error))
+            return redirect('rentalapp:company_rent_detail', pk=rental.company_id)
+
+        requested = count
+        if not trailer_ids:
+            trailer_ids = pick_free_trailers(rental, count, status=status, near=near)
+        result = assign_trailers(rental, trailer_ids, user=request.user)
+
+        if wants_json:
+            return JsonResponse({'rental': rental.pk, 'requested': requested or len(trailer_ids),
+                                 **result.as_dict()})
+
+        if result.accepted:
+            messages.success(request, f"Dodano przyczepki do wynajmu: {len(result.accepted)}.")
+        if result.rejected:
+            messages.warning(request, "Pominięto przyczepki: " + ", ".join(
+                f"#{trailer_id} ({REJECT_REASONS[reason].rstrip('.')})"
+                for trailer_id, reason in result.rejected.items()
+            ))
+        if requested and len(result.accepted) < requested:
+            messages.warning(
+                request, f"Wolnych przyczepek spełniających warunki było mniej niż {requested}.")
+        if not result.accepted and not result.rejected:
+            messages.info(request, "Brak przyczepek do dodania.")
+        return redirect('rentalapp:company_rent_detail', pk=rental.company_id)
+
     @staticmethod
     def add_rental(request):
         company_id = request.GET.get('company_id')
@@ -166,25 +275,76 @@ class RentViews:
 
     @staticmethod
     def company_list_view(request):
-        companies = Company.objects.all()
-        for company in companies:
-            rentals = Rental.objects.filter(company=company)
-            company.total_rentals = rentals.count()
-            company.total_income = sum(r.cost for r in rentals)
-        return render(request, 'rentalapp/rent/company_list.html', {'companies': companies})
+        query = (request.GET.get('q') or '').strip()
+        sort = request.GET.get('sort') or 'name'
+        descending = sort.startswith('-')
+        sort_field = RentViews.COMPANY_SORT_FIELDS.get(sort.lstrip('-'))
+        if sort_field is None:
+            sort, descending, sort_field = 'name', False, 'name'
+
+        companies = Company.objects.annotate(
+            total_rentals=Count('rentals'),
+            total_income=Coalesce(Sum('rentals__cost'), Value(Decimal('0.00')),
+                                  output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+        if query:
+            companies = companies.filter(name__icontains=query)
+
+        prefix = '-' if descending else ''
+        ordering = [f"{prefix}{sort_field}", f"{prefix}id"]
+        cursor = request.GET.get('cursor')
+        page = cached(
+            'company_list',
+            ['company', 'rental'],
+            lambda: paginate(companies, ordering, cursor=cursor, per_page=RentViews.COMPANIES_PER_PAGE),
+            # klucz z wartości kursora, nie z tekstu - uszkodzony kursor to pierwsza strona, bez osobnego wpisu
+            parts=(query, sort, cursor_values(companies, ordering, cursor)),
+        )
+        return render(request, 'rentalapp/rent/company_list.html', {
+            'companies': page.object_list,
+            'page': page,
+            'query': query,
+            'sort': sort,
+            'sort_links': {
+                key: f"-{key}" if sort == key else key
+                for key in RentViews.COMPANY_SORT_FIELDS
+            },
+        })
 
     @staticmethod
     def rent_view(request):
+        today = timezone.localdate()
         companies = (
             Company.objects
-            .filter(rentals__isnull=False)
-            .distinct()
-            .prefetch_related('rentals')
+            .annotate(
+                rental_count=Count('rentals'),
+                total_cost=Sum('rentals__cost'),
+                active_rental_count=Count(
+                    'rentals',
+                    filter=Q(rentals__start_date__lte=today, rentals__end_date__gte=today),
+                ),
+                last_rental_date=Max('rentals__start_date'),
+            )
+            .filter(rental_count__gt=0)
         )
-        for company in companies:
-            company.total_cost = company.rentals.aggregate(total=Sum('cost'))['total'] or 0
+        companies = cached('rent', ['company', 'rental'], lambda: list(companies), parts=(today,))
         return render(request, 'rentalapp/rent/rent.html', {'companies': companies})
 
+    @staticmethod
+    def rentals_export(request):
+        """CSV wynajmów; ?company= oraz ?date_from=&date_to= (wynajmy trwające w tym okresie)"""
+        rentals = Rental.objects.filter(**date_filter(request, 'start_date', 'end_date'))
+        company_id = request.GET.get('company')
+        if company_id and company_id.isdigit():
+            rentals = rentals.filter(company_id=company_id)
+        return csv_export(
+            'wynajmy',
+            ['ID', 'Firma', 'Nazwa', 'Od', 'Do', 'Cena miesięczna', 'Koszt', 'Utworzono'],
+            rentals.order_by('id').values_list(
+                'id', 'company__name', 'name', 'start_date', 'end_date', 'monthly_price', 'cost', 'created_at'),
+            lambda row: (*row[:7], timezone.localtime(row[7]).strftime('%Y-%m-%d %H:%M:%S')),
+        )
+
     @staticmethod
     def rental_history_view(request):
         rentals = (
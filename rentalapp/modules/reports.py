@@ -1,33 +1,49 @@
-from django.http import HttpResponse
-from django.template.loader import get_template
-from django.utils import timezone
-from xhtml2pdf import pisa
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 
-from rentalapp.models import Trailer, Rental, WarehouseItem, ServiceHistory
+from rentalapp.models import ReportJob
+from rentalapp.report_jobs import enqueue_report
 
 
 class ReportsViews:
     @staticmethod
     def generate_report_pdf(request):
-        trailers = Trailer.objects.all()
-        rentals = Rental.objects.select_related('company').all()
-        warehouse_items = WarehouseItem.objects.all()
-        services = ServiceHistory.objects.all()
+        job = enqueue_report(user=request.user)
+        if job.status == 'done':
+            response = ReportsViews.report_file_response(job)
+            if response is not None:
+                return response
+        return redirect('rentalapp:report_job', pk=job.pk)
 
-        context = {
-            'trailers': trailers,
-            'rentals': rentals,
-            'warehouse_items': warehouse_items,
-            'services': services,
-            'generated_on': timezone.now()
-        }
+    @staticmethod
+    def report_job(request, pk):
+        job = get_object_or_404(ReportJob, pk=pk)
+        return render(request, 'rentalapp/report_job.html', {'job': job})
 
-        template = get_template("rentalapp/report_template.html")
-        html = template.render(context)
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="raport.pdf"'
+    @staticmethod
+    def report_job_status(request, pk):
+        job = get_object_or_404(ReportJob, pk=pk)
+        return JsonResponse({
+            'id': job.pk,
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'download_url': reverse('rentalapp:report_job_download', args=[job.pk]) if job.status == 'done' else None,
+        })
 
-        pisa_status = pisa.CreatePDF(html, dest=response)
-        if pisa_status.err:
-            return HttpResponse('Błąd podczas generowania PDF', status=500)
-        return response
\ No newline at end of file
+    @staticmethod
+    def report_job_download(request, pk):
+        job = get_object_or_404(ReportJob, pk=pk, status='done')
+        response = ReportsViews.report_file_response(job)
+        if response is None:
+            raise Http404("Plik raportu nie jest już dostępny.")
+        return response
+
+    @staticmethod
+    def report_file_response(job):
+        """Plik gotowego raportu; None, jeśli w międzyczasie usunęło go czyszczenie (prune_artifacts)"""
+        try:
+            report = open(job.file_path, 'rb')
+        except FileNotFoundError:
+            return None
+        return FileResponse(report, as_attachment=True, filename='raport.pdf', content_type='application/pdf')
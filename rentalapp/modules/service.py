@@ -3,10 +3,14 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 
 from rentalapp.constants import SERVICE_CENTER
+from rentalapp.exports import csv_export, date_filter
 from rentalapp.models import Trailer, ServiceHistory, TrailerLog, RentalTrailer
+from rentalapp.spatial import nearest_trailers
 
 
 class ServiceViews:
+    NEARBY_RADIUS_KM = 10
+
     @staticmethod
     def servicehistory_list(request):
         service_histories = ServiceHistory.objects.select_related('trailer').all()
@@ -25,13 +29,34 @@ class ServiceViews:
             {'service_histories': services},
         )
 
+    @staticmethod
+    def service_history_export(request):
+        """CSV historii serwisowej; ?trailer= oraz ?date_from=&date_to= (data serwisu)"""
+        services = ServiceHistory.objects.filter(**date_filter(request, 'service_date'))
+        trailer_id = request.GET.get('trailer')
+        if trailer_id and trailer_id.isdigit():
+            services = services.filter(trailer_id=trailer_id)
+        return csv_export(
+            'historia-serwisowa',
+            ['Data serwisu', 'Przyczepka', 'Opis', 'Koszt'],
+            services.order_by('-service_date', '-id').values_list('service_date', 'trailer__name', 'description', 'cost'),
+        )
+
     @staticmethod
     def active_services_view(request):
         trailers_in_service = Trailer.objects.filter(status='maintenance')
+        nearby = nearest_trailers(
+            SERVICE_CENTER["lat"], SERVICE_CENTER["lon"], k=None, radius_km=ServiceViews.NEARBY_RADIUS_KM)
+        trailers = Trailer.objects.in_bulk([trailer_id for trailer_id, _ in nearby])
         return render(
             request,
             'rentalapp/service/active_services.html',
-            {'trailers': trailers_in_service},
+            {
+                'trailers': trailers_in_service,
+                'nearby_trailers': [(trailers[pk], distance) for pk, distance in nearby if pk in trailers],
+                'nearby_radius_km': ServiceViews.NEARBY_RADIUS_KM,
+                'service_center': SERVICE_CENTER,
+            },
         )
 
     @staticmethod
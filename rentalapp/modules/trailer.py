@@ -1,40 +1,50 @@
 # rentalapp/modules/trailer.py
-import platform
-import subprocess
-
+from asgiref.sync import sync_to_async
 from django.contrib import messages
-from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 
+from rentalapp import events, geo, liveness
+from rentalapp.availability import free_trailers
+from rentalapp.caching import cached
+from rentalapp.constants import SERVICE_CENTER
 from rentalapp.forms import TrailerForm
 from rentalapp.models import Trailer, ServiceHistory, TrailerLog
+from rentalapp.probing import probe_host
+from rentalapp.spatial import nearest_trailers
+from rentalapp.utils import ping_settings
 
 
 class TrailerViews:
+    NEAREST_DEFAULT = 10
+    NEAREST_MAX = 100
+
     @staticmethod
-    def is_trailer_active(ip_address: str) -> bool:
-        param = "-n" if platform.system().lower() == "windows" else "-c"
-        command = ["ping", param, "1", ip_address]
-        try:
-            subprocess.check_output(command, stderr=subprocess.STDOUT)
-            return True
-        except subprocess.CalledProcessError:
-            return False
+    def liveness_status(trailer: Trailer):
+        """Ostatni znany stan z cache uzupełniany przez proces pingujący (bez pingu w żądaniu)"""
+        if trailer.status == "maintenance":
+            return "maintenance", None
+        known = liveness.get(trailer.pk)
+        if known is None:
+            return trailer.status, None
+        return ("active" if known["alive"] else "inactive"), known["checked_at"]
 
     @staticmethod
     def trailer_list(request):
-        trailers = Trailer.objects.all()
-        return render(request, "rentalapp/trailer/trailer_list.html", {"trailers": trailers})
+        trailers = cached('trailer_list', ['trailer'], lambda: list(Trailer.objects.all()))
+        return render(request, "rentalapp/trailer/trailer_list.html", {
+            "trailers": trailers,
+            "live_events": events.live_events_enabled(request),
+        })
 
     @staticmethod
     def trailer_detail(request, pk: int):
         trailer = get_object_or_404(Trailer, pk=pk)
         service_histories = ServiceHistory.objects.filter(trailer=trailer)
 
-        if trailer.status == "maintenance":
-            active_status = "maintenance"
-        else:
-            active_status = "active" if TrailerViews.is_trailer_active(trailer.ip_address) else "inactive"
+        active_status, checked_at = TrailerViews.liveness_status(trailer)
 
         return render(
             request,
@@ -43,9 +53,98 @@ class TrailerViews:
                 "trailer": trailer,
                 "service_histories": service_histories,
                 "active_status": active_status,
+                "checked_at": checked_at,
+                "live_events": events.live_events_enabled(request),
             },
         )
 
+    @staticmethod
+    async def trailer_probe(request, pk: int):
+        trailer = await aget_object_or_404(Trailer, pk=pk)
+        if trailer.status == "maintenance":
+            return JsonResponse({"status": "maintenance", "checked_at": None})
+
+        config = ping_settings()
+        alive, latency = await probe_host(trailer.ip_address, config["TIMEOUT"])
+        entry = await sync_to_async(liveness.record_probe)(trailer.pk, alive, config["INTERVAL"])
+
+        return JsonResponse({
+            "status": "active" if alive else "inactive",
+            "latency_ms": round(latency * 1000) if alive else None,
+            "checked_at": timezone.localtime(entry["checked_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+    @staticmethod
+    async def trailer_events(request):
+        """
+        Strumień SSE zmian statusu przyczepek (wpisy logu 'status_change' i 'ping');
+        ?trailer= zawęża go do jednej przyczepki. Po ponownym połączeniu wznawia od
+        nagłówka Last-Event-ID, a bez niego zaczyna od bieżącego stanu logu.
+        """
+        if not events.live_events_enabled(request):
+            # pod WSGI nie zajmujemy wątku roboczego; na 204 EventSource przestaje się łączyć
+            return HttpResponse(status=204)
+        trailer_id = request.GET.get("trailer")
+        trailer_id = int(trailer_id) if trailer_id and trailer_id.isdigit() else None
+        last_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id") or ""
+        last_id = int(last_id) if last_id.isdigit() else await events.latest_log_id()
+
+        response = StreamingHttpResponse(
+            events.event_stream(last_id, trailer_id), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def trailer_nearest(request):
+        """
+        Najbliższe przyczepki jako JSON: ?point=szer,dł albo ?site=service (warsztat),
+        ?k= (domyślnie 10), opcjonalnie ?radius_km= oraz ?date_from=&date_to= - wtedy
+        tylko przyczepki wolne w tym terminie i niebędące w serwisie.
+        """
+        point = (
+            (SERVICE_CENTER["lat"], SERVICE_CENTER["lon"]) if request.GET.get("site") == "service"
+            else geo.parse_point(request.GET.get("point"))
+        )
+        if point is None:
+            return JsonResponse({"error": "Podaj point=szerokość,długość albo site=service"}, status=400)
+        try:
+            k = max(1, min(int(request.GET.get("k") or TrailerViews.NEAREST_DEFAULT), TrailerViews.NEAREST_MAX))
+            radius_km = float(request.GET["radius_km"]) if request.GET.get("radius_km") else None
+            if radius_km is not None and not radius_km >= 0:  # także NaN
+                raise ValueError(radius_km)
+            date_from = parse_date(request.GET.get("date_from") or "")
+            date_to = parse_date(request.GET.get("date_to") or "") or date_from
+        except ValueError:
+            return JsonResponse({"error": "Niepoprawne k, radius_km lub data"}, status=400)
+
+        accept = None
+        if date_from:
+            def accept(ids):
+                return set(
+                    free_trailers(date_from, date_to)
+                    .filter(pk__in=ids)
+                    .exclude(status="maintenance")
+                    .values_list("pk", flat=True)
+                )
+
+        found = nearest_trailers(*point, k=k, radius_km=radius_km, accept=accept)
+        trailers = Trailer.objects.in_bulk([trailer_id for trailer_id, _ in found])
+        return JsonResponse({
+            "point": {"lat": point[0], "lon": point[1]},
+            "trailers": [
+                {
+                    "id": trailer_id,
+                    "name": trailers[trailer_id].name,
+                    "status": trailers[trailer_id].status,
+                    "lat": trailers[trailer_id].latitude,
+                    "lon": trailers[trailer_id].longitude,
+                    "distance_km": round(distance, 3),
+                }
+                for trailer_id, distance in found if trailer_id in trailers
+            ],
+        })
+
     @staticmethod
     def trailer_create(request):
         if request.method == "POST":
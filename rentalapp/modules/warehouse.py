@@ -1,6 +1,7 @@
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
 
+from rentalapp.exports import csv_export, date_filter
 from rentalapp.forms import WarehouseItemForm
 from rentalapp.models import WarehouseItem, WarehouseLog
 
@@ -12,6 +13,16 @@ class WarehouseViews:
         items = WarehouseItem.objects.all()
         return render(request, 'rentalapp/warehouse/warehouse_manager.html', {'items': items})
 
+    @staticmethod
+    def warehouse_export(request):
+        """CSV stanów magazynu; ?date_from=&date_to= (data stanu)"""
+        items = WarehouseItem.objects.filter(**date_filter(request, 'date_state'))
+        return csv_export(
+            'magazyn',
+            ['ID', 'Nazwa', 'Ilość', 'Data stanu', 'Komentarz'],
+            items.order_by('id').values_list('id', 'name', 'quantity', 'date_state', 'comment'),
+        )
+
     @staticmethod
     def warehouse_add_item_view(request):
         if request.method == 'POST':
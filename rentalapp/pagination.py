@@ -0,0 +1,133 @@
+import base64
+import binascii
+import datetime
+import json
+from dataclasses import dataclass, field
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Jak DjangoJSONEncoder, ale bez obcinania mikrosekund - kursor musi wskazywać wiersz dokładnie"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Odczytuje kursor z adresu. Uszkodzony kursor (także z wartościami złego typu) traktujemy jak jego brak"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+@dataclass
+class KeysetPage:
+    object_list: list = field(default_factory=list)
+    next_cursor: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _value(obj, name):
+    return obj[name] if isinstance(obj, dict) else getattr(obj, name)
+
+
+def keyset_filter(ordering, values):
+    """
+    Warunek "za kursorem" dla sortowania po kilku kolumnach, np. dla
+    ['-timestamp', '-id']: timestamp < t OR (timestamp = t AND id < i).
+    """
+    conditions = []
+    for position, key in enumerate(ordering):
+        name = key.lstrip('-')
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        equal = {prev.lstrip('-'): values[i] for i, prev in enumerate(ordering[:position])}
+        conditions.append(Q(**equal, **{f"{name}__{lookup}": values[position]}))
+    return reduce(lambda left, right: left | right, conditions)
+
+
+def _ordering_field(queryset, name):
+    annotation = queryset.query.annotations.get(name)
+    return annotation.output_field if annotation is not None else queryset.model._meta.get_field(name)
+
+
+def clean_cursor(queryset, ordering, values):
+    """
+    Wartości kursora sprawdzone typami pól sortowania - kursor pochodzi z adresu,
+    więc może być dowolny. None, jeśli któraś wartość nie pasuje do swojego pola.
+    """
+    if values is None or len(values) != len(ordering):
+        return None
+    cleaned = []
+    for key, value in zip(ordering, values):
+        if value is None or isinstance(value, (list, dict)):
+            return None
+        try:
+            value = _ordering_field(queryset, key.lstrip('-')).to_python(value)
+        except (ValidationError, ValueError, TypeError):
+            return None
+        if value is None:
+            return None
+        cleaned.append(value)
+    return cleaned
+
+
+def cursor_values(queryset, ordering, cursor):
+    """Sprawdzone wartości kursora z adresu albo None (pierwsza strona) - np. do klucza cache strony"""
+    return clean_cursor(queryset, ordering, decode_cursor(cursor))
+
+
+def _keyset_queryset(queryset, ordering, cursor):
+    queryset = queryset.order_by(*ordering)
+    values = cursor_values(queryset, ordering, cursor)
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    return queryset
+
+
+def _page(rows, ordering, per_page):
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor([_value(rows[-1], key.lstrip('-')) for key in ordering])
+    return KeysetPage(object_list=rows, next_cursor=next_cursor)
+
+
+def paginate(queryset, ordering, cursor=None, per_page=50):
+    """
+    Stronicowanie kluczem (keyset): zamiast OFFSET filtruje po wartościach
+    ostatniego wiersza poprzedniej strony, więc koszt nie rośnie z numerem strony.
+    Ostatnie pole ``ordering`` musi być unikalne (zwykle 'id').
+    """
+    queryset = _keyset_queryset(queryset, ordering, cursor)
+    return _page(list(queryset[:per_page + 1]), ordering, per_page)
+
+
+async def apaginate(queryset, ordering, cursor=None, per_page=50):
+    """To samo co paginate() dla widoków asynchronicznych"""
+    queryset = _keyset_queryset(queryset, ordering, cursor)
+    return _page([row async for row in queryset[:per_page + 1]], ordering, per_page)
@@ -0,0 +1,12 @@
+"""
+Renderowanie HTML do PDF bez zależności od Django - moduł jest importowany
+przez procesy potomne puli raportów, które nie ładują ustawień ani modeli.
+"""
+from xhtml2pdf import pisa
+
+
+def html_to_pdf(html, path):
+    """Zapisuje PDF z ``html`` do ``path``; zwraca False, jeśli xhtml2pdf zgłosił błąd"""
+    with open(path, 'wb') as output:
+        status = pisa.CreatePDF(html, dest=output)
+    return not status.err
@@ -0,0 +1,198 @@
+"""
+Wyliczanie kosztów wynajmów i rozliczanie przychodu na miesiące.
+
+Cała arytmetyka wsadowa działa na groszach w tablicach NumPy (int64), a do
+Decimal wracamy dopiero przy wyniku. Koszt jednego wynajmu liczy się tak jak
+zawsze: dni * cena_miesięczna / 30, zaokrąglone do groszy (połówki do parzystej).
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+DAYS_IN_BILLING_MONTH = 30
+
+
+def rental_days(start_date, end_date):
+    return (end_date - start_date).days + 1
+
+
+def rental_cost(start_date, end_date, monthly_price):
+    """Koszt jednego wynajmu (Decimal) - definicja, z którą zgodny jest silnik wsadowy"""
+    daily_rate = monthly_price / DAYS_IN_BILLING_MONTH
+    return round(rental_days(start_date, end_date) * daily_rate, 2)
+
+
+def to_cents(amount):
+    return int(Decimal(amount).scaleb(2).to_integral_value())
+
+
+def from_cents(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+@dataclass
+class RentalBatch:
+    """Wynajmy jako kolumny: id, firma, początek i koniec (numery dni), cena miesięczna w groszach"""
+    ids: np.ndarray
+    company_ids: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    price_cents: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Z wierszy (id, id_firmy, początek, koniec, cena_miesięczna) - np. values_list() na Rental"""
+        rows = list(rows)
+        columns = list(zip(*rows)) if rows else [()] * 5
+        return cls(
+            ids=np.array(columns[0], dtype=np.int64),
+            company_ids=np.array(columns[1], dtype=np.int64),
+            starts=np.array([day.toordinal() for day in columns[2]], dtype=np.int64),
+            ends=np.array([day.toordinal() for day in columns[3]], dtype=np.int64),
+            price_cents=np.array([to_cents(price) for price in columns[4]], dtype=np.int64),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def days(self):
+        return self.ends - self.starts + 1
+
+    def costs(self):
+        """
+        Koszty w groszach. Dzielenie przez 30 daje iloraz i resztę. Przy reszcie
+        równej dokładnie połowie: jeśli cena dzieli się przez 3, stawka dzienna
+        w Decimal jest dokładna i wystarczy zaokrąglić do parzystej; w przeciwnym
+        razie wynik zależy od zaokrągleń pośrednich Decimal, więc te (nieliczne)
+        wiersze liczymy przez rental_cost.
+        """
+        numerators = self.days() * self.price_cents
+        quotients, remainders = np.divmod(numerators, DAYS_IN_BILLING_MONTH)
+        costs = quotients + (2 * remainders > DAYS_IN_BILLING_MONTH)
+        halves = 2 * remainders == DAYS_IN_BILLING_MONTH
+        exact = halves & (self.price_cents % 3 == 0)
+        costs[exact] += quotients[exact] % 2
+        for index in np.flatnonzero(halves & ~exact):
+            costs[index] = to_cents(rental_cost(
+                date.fromordinal(int(self.starts[index])),
+                date.fromordinal(int(self.ends[index])),
+                from_cents(self.price_cents[index]),
+            ))
+        return costs
+
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def month_index(ordinals):
+    """Numer miesiąca liczony od 1970-01 dla numerów dni (date.toordinal())"""
+    days = (np.asarray(ordinals) - EPOCH_ORDINAL).astype('datetime64[D]')
+    return days.astype('datetime64[M]').astype(np.int64)
+
+
+def month_first_ordinals(months):
+    """Numer dnia (date.toordinal()) pierwszego dnia miesiąca"""
+    firsts = np.asarray(months).astype('datetime64[M]').astype('datetime64[D]')
+    return firsts.astype(np.int64) + EPOCH_ORDINAL
+
+
+def month_date(month):
+    return date.fromordinal(int(month_first_ordinals([month])[0]))
+
+
+def group_sum(positions, values, size):
+    """Sumy ``values`` w grupach - dokładnie, na liczbach całkowitych"""
+    totals = np.zeros(size, dtype=np.int64)
+    np.add.at(totals, positions, values)
+    return totals
+
+
+def split_cents(totals, weights, groups):
+    """
+    Dzieli kwoty ``totals[grupa]`` między wiersze grupy proporcjonalnie do ``weights``
+    metodą największych reszt - suma części w grupie jest zawsze równa kwocie.
+    """
+    if not len(weights):
+        return np.zeros(0, dtype=np.int64)
+    group_weights = group_sum(groups, weights, len(totals))
+    scaled = totals[groups] * weights
+    shares, remainders = np.divmod(scaled, np.maximum(group_weights[groups], 1))
+    missing = totals - group_sum(groups, shares, len(totals))
+    # w każdej grupie grosz dostają wiersze z największą resztą
+    order = np.lexsort((-remainders, groups))
+    group_starts = np.searchsorted(groups[order], np.arange(len(totals)))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - group_starts[groups[order]]
+    return shares + (rank < missing[groups])
+
+
+def monthly_revenue(batch, costs=None):
+    """
+    Przychód rozliczony na miesiące kalendarzowe proporcjonalnie do dni wynajmu
+    w każdym miesiącu: (wiersze, miesiące, grosze) - po jednym wierszu na parę wynajem-miesiąc.
+    """
+    costs = batch.costs() if costs is None else costs
+    first_months = month_index(batch.starts)
+    # wynajem z końcem przed początkiem nie ma dni do rozliczenia
+    month_counts = np.maximum(month_index(batch.ends) - first_months + 1, 0)
+    rows = np.repeat(np.arange(len(batch)), month_counts)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(month_counts) - month_counts, month_counts)
+    months = first_months[rows] + offsets
+
+    unique_months, positions = np.unique(months, return_inverse=True)
+    month_firsts = month_first_ordinals(unique_months)
+    next_firsts = month_first_ordinals(unique_months + 1)
+    segment_days = (
+        np.minimum(batch.ends[rows], next_firsts[positions] - 1)
+        - np.maximum(batch.starts[rows], month_firsts[positions]) + 1
+    )
+    return rows, months, split_cents(costs, segment_days, rows)
+
+
+def costs_in_period(batch, first, last, costs=None):
+    """
+    Koszty w groszach rozliczone w miesiącach od ``first`` do ``last`` (daty,
+    liczą się całe miesiące) - np. do zestawień rocznych zgodnych z revenue_by_month.
+    """
+    rows, months, cents = monthly_revenue(batch, costs)
+    in_period = (months >= month_index([first.toordinal()])[0]) & (months <= month_index([last.toordinal()])[0])
+    return group_sum(rows[in_period], cents[in_period], len(batch))
+
+
+def revenue_by_month(batch, costs=None):
+    """{date(rok, miesiąc, 1): Decimal} - suma przychodu rozliczonego w miesiącach"""
+    _, months, cents = monthly_revenue(batch, costs)
+    unique_months, positions = np.unique(months, return_inverse=True)
+    totals = group_sum(positions, cents, len(unique_months))
+    return {month_date(month): from_cents(total) for month, total in zip(unique_months, totals)}
+
+
+def revenue_by_company(batch, costs=None):
+    """{id_firmy: Decimal}"""
+    costs = batch.costs() if costs is None else costs
+    companies, positions = np.unique(batch.company_ids, return_inverse=True)
+    totals = group_sum(positions, costs, len(companies))
+    return {int(company): from_cents(total) for company, total in zip(companies, totals)}
+
+
+def revenue_by_trailer(batch, assignments, costs=None):
+    """
+    {id_przyczepki: Decimal} - koszt wynajmu dzielony po równo między jego przyczepki.
+    ``assignments`` to pary (id_wynajmu, id_przyczepki), np. z RentalTrailer.
+    """
+    costs = batch.costs() if costs is None else costs
+    assignments = np.array(sorted(assignments), dtype=np.int64).reshape(-1, 2)
+    if not len(batch) or not len(assignments):
+        return {}
+    order = np.argsort(batch.ids)
+    sorted_ids = batch.ids[order]
+    positions = np.minimum(np.searchsorted(sorted_ids, assignments[:, 0]), len(order) - 1)
+    known = sorted_ids[positions] == assignments[:, 0]
+    rows = order[positions[known]]
+    trailers = assignments[known, 1]
+    shares = split_cents(costs, np.ones(len(rows), dtype=np.int64), rows)
+    unique_trailers, trailer_positions = np.unique(trailers, return_inverse=True)
+    totals = group_sum(trailer_positions, shares, len(unique_trailers))
+    return {int(trailer): from_cents(total) for trailer, total in zip(unique_trailers, totals)}
@@ -0,0 +1,110 @@
+import asyncio
+import math
+import os
+import random
+import subprocess
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ProbeResult:
+    key: object
+    host: str
+    alive: bool
+    latency: float
+
+
+@dataclass
+class SweepReport:
+    results: list = field(default_factory=list)
+    duration: float = 0.0
+    latency_percentiles: dict = field(default_factory=dict)
+
+    @property
+    def alive_count(self):
+        return sum(1 for r in self.results if r.alive)
+
+    def summary(self):
+        """Krótki opis przebiegu do logów"""
+        parts = [
+            f"{len(self.results)} hostów",
+            f"{self.alive_count} odpowiada",
+            f"czas {self.duration:.2f} s",
+        ]
+        for name, value in self.latency_percentiles.items():
+            parts.append(f"{name} {value * 1000:.0f} ms")
+        return ", ".join(parts)
+
+
+def ping_command(host):
+    return ["ping", "-n", "1", host] if os.name == "nt" else ["ping", "-c", "1", host]
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """Percentyle metodą najbliższej rangi, np. {'p50': 0.012, ...}"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {}
+    for point in points:
+        rank = max(1, math.ceil(point / 100 * len(ordered)))
+        result[f"p{point}"] = ordered[rank - 1]
+    result["max"] = ordered[-1]
+    return result
+
+
+async def probe_host(host, timeout=2.0):
+    """Pojedynczy ping bez blokowania pętli zdarzeń. Zwraca (odpowiada, opóźnienie w s)"""
+    started = time.perf_counter()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *ping_command(host),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return False, time.perf_counter() - started
+
+    try:
+        returncode = await asyncio.wait_for(process.wait(), timeout)
+    except asyncio.TimeoutError:
+        returncode = None
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    return returncode == 0, time.perf_counter() - started
+
+
+async def sweep(targets, concurrency=256, timeout=2.0, jitter=0.0):
+    """
+    Pinguje równolegle wszystkie cele [(klucz, host), ...].
+
+    Liczbę jednocześnie działających pingów ogranicza ``concurrency``, a losowe
+    opóźnienie startu (``jitter`` sekund) rozkłada je w czasie.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(key, host):
+        if jitter:
+            await asyncio.sleep(random.uniform(0, jitter))
+        async with semaphore:
+            alive, latency = await probe_host(host, timeout)
+        return ProbeResult(key=key, host=host, alive=alive, latency=latency)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run(key, host) for key, host in targets))
+    duration = time.perf_counter() - started
+
+    return SweepReport(
+        results=list(results),
+        duration=duration,
+        latency_percentiles=percentiles([r.latency for r in results if r.alive]),
+    )
+
+
+def run_sweep(targets, **options):
+    """Synchroniczne wejście do ``sweep`` dla kodu poza pętlą asyncio"""
+    return asyncio.run(sweep(targets, **options))
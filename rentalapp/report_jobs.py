@@ -0,0 +1,135 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import ReportJob
+from .reporting import build_report
+from .versions import version_key
+
+REPORT_DEFAULTS = {
+    'STORAGE_DIR': None,
+    'WORKERS': 2,
+    'POLL_INTERVAL': 2,
+    'STALE_AFTER': 1800,
+    'KEEP': 5,
+    'RENDER_PROCESSES': None,
+}
+
+REPORT_DEPENDENCIES = ('trailer', 'company', 'rental', 'warehouseitem', 'servicehistory')
+
+_executor = None
+_running = set()
+
+
+def report_settings():
+    """Ustawienia raportów z settings.REPORTS uzupełnione domyślnymi"""
+    config = {**REPORT_DEFAULTS, **getattr(settings, 'REPORTS', {})}
+    config['STORAGE_DIR'] = Path(config['STORAGE_DIR'] or settings.BASE_DIR / 'reports')
+    config['RENDER_PROCESSES'] = config['RENDER_PROCESSES'] or os.cpu_count() or 1
+    return config
+
+
+def current_report_key():
+    """Klucz raportu wyliczany z wersji danych - zmienia się po każdej zmianie danych w raporcie"""
+    return f"report-{version_key(*REPORT_DEPENDENCIES)}"
+
+
+def artifact_path(key):
+    return report_settings()['STORAGE_DIR'] / f"{key}.pdf"
+
+
+def ready_job(key):
+    """Gotowy raport dla klucza, jeśli jego plik nadal istnieje"""
+    job = ReportJob.objects.filter(key=key, status='done').order_by('-finished_at').first()
+    if job and Path(job.file_path).exists():
+        return job
+    return None
+
+
+def enqueue_report(user=None):
+    """Zwraca gotowe zadanie albo to już oczekujące dla bieżących danych; w razie potrzeby tworzy nowe"""
+    key = current_report_key()
+    job = ready_job(key)
+    if job:
+        return job
+    job = ReportJob.objects.filter(key=key, status__in=['queued', 'running']).order_by('-created_at').first()
+    if job:
+        return job
+    return ReportJob.objects.create(key=key, requested_by=user)
+
+
+def run_report_job(job_id):
+    """Generuje raport dla zadania (wywoływane w wątku puli procesu roboczego)"""
+    try:
+        job = ReportJob.objects.get(pk=job_id)
+        path = artifact_path(job.key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix('.part')
+        try:
+            with open(partial, 'wb') as output:
+                build_report(output, processes=report_settings()['RENDER_PROCESSES'])
+            partial.replace(path)
+        except Exception as exc:
+            partial.unlink(missing_ok=True)
+            ReportJob.objects.filter(pk=job_id).update(
+                status='failed', error=repr(exc), finished_at=timezone.now())
+            return
+        ReportJob.objects.filter(pk=job_id).update(
+            status='done', file_path=str(path), finished_at=timezone.now())
+        prune_artifacts()
+    finally:
+        _running.discard(job_id)
+        connection.close()
+
+
+def prune_artifacts():
+    """
+    Zostawia pliki tylko KEEP najnowszych gotowych raportów. Starsze zadania
+    zostają jako 'expired' (odpytujący je klient dostaje status, a nie 404),
+    a plik usuwamy dopiero wtedy, gdy żadne gotowe zadanie go nie wskazuje.
+    """
+    old_jobs = list(ReportJob.objects.filter(status='done').order_by('-finished_at')[report_settings()['KEEP']:])
+    if not old_jobs:
+        return
+    ReportJob.objects.filter(pk__in=[job.pk for job in old_jobs], status='done').update(status='expired')
+    still_used = set(ReportJob.objects.filter(status='done').values_list('file_path', flat=True))
+    for file_path in {job.file_path for job in old_jobs} - still_used:
+        Path(file_path).unlink(missing_ok=True)
+
+
+def dispatch_report_jobs():
+    """Przekazuje zadania z kolejki do puli wątków (zadanie okresowe procesu roboczego)"""
+    global _executor
+    config = report_settings()
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=config['WORKERS'], thread_name_prefix='report')
+
+    stale = timezone.now() - timedelta(seconds=config['STALE_AFTER'])
+    ReportJob.objects.filter(status='running', started_at__lt=stale).exclude(pk__in=_running).update(status='queued')
+
+    free_slots = config['WORKERS'] - len(_running)
+    if free_slots <= 0:
+        return None
+
+    dispatched = 0
+    for job_id in ReportJob.objects.filter(status='queued').order_by('created_at').values_list('pk', flat=True)[:free_slots]:
+        claimed = ReportJob.objects.filter(pk=job_id, status='queued').update(
+            status='running', started_at=timezone.now())
+        if claimed:
+            _running.add(job_id)
+            _executor.submit(run_report_job, job_id)
+            dispatched += 1
+    return f"uruchomiono raportów: {dispatched}" if dispatched else None
+
+
+def shutdown_report_pool():
+    """Czeka na dokończenie rozpoczętych raportów przy zamykaniu procesu roboczego"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,175 @@
+import multiprocessing
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+
+from django.db.models import Case, CharField, Count, F, Sum, Value, When
+from django.template.loader import get_template
+from django.utils import timezone
+from pypdf import PdfWriter
+
+from .models import Company, Trailer, Rental, WarehouseItem, ServiceHistory
+from .pdf import html_to_pdf
+
+REPORT_CHUNK_SIZE = 500
+
+
+class ReportError(Exception):
+    pass
+
+
+@dataclass
+class ReportSection:
+    template: str
+    queryset: object
+
+    def rows(self):
+        return self.queryset() if callable(self.queryset) else self.queryset
+
+
+def status_label():
+    """Etykieta statusu przyczepki liczona w SQL (dla zapytań .values())"""
+    return Case(
+        *[When(status=code, then=Value(label)) for code, label in Trailer.STATUS_CHOICES],
+        default=F('status'),
+        output_field=CharField(),
+    )
+
+
+def build_report_sections():
+    """
+    Sekcje raportu, każda jako jedno zapytanie: listy pobierają tylko potrzebne
+    kolumny (z relacjami przez select_related), a zestawienia są agregowane w bazie.
+    """
+    return [
+        ReportSection('rentalapp/report/summary_fleet.html', lambda: (
+            Trailer.objects
+            .values('status')
+            .annotate(label=status_label(), count=Count('id'))
+            .order_by('status')
+        )),
+        ReportSection('rentalapp/report/summary_revenue.html', lambda: (
+            Company.objects
+            .annotate(rental_count=Count('rentals'), revenue=Sum('rentals__cost'))
+            .filter(rental_count__gt=0)
+            .values('id', 'name', 'rental_count', 'revenue')
+            .order_by('-revenue', 'id')
+        )),
+        ReportSection('rentalapp/report/summary_service_costs.html', lambda: (
+            ServiceHistory.objects
+            .values('trailer_id', 'trailer__name')
+            .annotate(service_count=Count('id'), total_cost=Sum('cost'))
+            .order_by('-total_cost', 'trailer_id')
+        )),
+        ReportSection('rentalapp/report/trailers.html', lambda: (
+            Trailer.objects.only('id', 'name', 'status', 'ip_address').order_by('id')
+        )),
+        ReportSection('rentalapp/report/rentals.html', lambda: (
+            Rental.objects
+            .select_related('company')
+            .only('id', 'start_date', 'end_date', 'monthly_price', 'company__name')
+            .order_by('id')
+        )),
+        ReportSection('rentalapp/report/warehouse.html', lambda: (
+            WarehouseItem.objects.only('id', 'name', 'quantity', 'date_state').order_by('id')
+        )),
+        ReportSection('rentalapp/report/services.html', lambda: (
+            ServiceHistory.objects
+            .select_related('trailer')
+            .only('id', 'service_date', 'description', 'trailer__name')
+            .order_by('id')
+        )),
+    ]
+
+
+def iter_chunks(queryset, size):
+    """Dzieli wynik zapytania na listy po ``size`` wierszy; pusta sekcja daje jedną pustą porcję"""
+    rows = queryset.iterator(chunk_size=size)
+    chunk = list(islice(rows, size))
+    yield chunk
+    while len(chunk) == size:
+        chunk = list(islice(rows, size))
+        if chunk:
+            yield chunk
+
+
+def iter_report_parts(generated_on, sections=None, chunk_size=REPORT_CHUNK_SIZE):
+    """Kolejne fragmenty raportu jako (szablon, kontekst) - każdy obejmuje co najwyżej ``chunk_size`` wierszy"""
+    first_part = True
+    for section in sections or build_report_sections():
+        for index, rows in enumerate(iter_chunks(section.rows(), chunk_size)):
+            yield section.template, {
+                'rows': rows,
+                'first_chunk': index == 0,
+                'first_part': first_part,
+                'generated_on': generated_on,
+            }
+            first_part = False
+
+
+def render_part(template_name, context, path):
+    html = get_template(template_name).render(context)
+    if not html_to_pdf(html, path):
+        raise ReportError(f"Błąd renderowania {template_name}")
+    return path
+
+
+def render_parts_parallel(parts, workdir, processes):
+    """
+    Renderuje fragmenty w puli procesów. Szablony wypełniamy tutaj (potrzebują
+    bazy), a procesy potomne wykonują tylko kosztowną konwersję HTML -> PDF.
+    W kolejce czeka najwyżej 2 * ``processes`` fragmentów, więc pamięć nie rośnie z rozmiarem raportu.
+    """
+    def collect(template_name, future):
+        if not future.result():
+            raise ReportError(f"Błąd renderowania {template_name}")
+
+    # 'spawn' - proces roboczy ma własne wątki, a fork procesu z wątkami nie jest bezpieczny
+    pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+    paths, pending = [], deque()
+    try:
+        for index, (template_name, context) in enumerate(parts):
+            path = Path(workdir) / f"{index:05d}.pdf"
+            html = get_template(template_name).render(context)
+            pending.append((template_name, pool.submit(html_to_pdf, html, str(path))))
+            paths.append(path)
+            while len(pending) >= processes * 2:
+                collect(*pending.popleft())
+        while pending:
+            collect(*pending.popleft())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return paths
+
+
+def merge_pdfs(paths, output):
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(str(path))
+    writer.write(output)
+    writer.close()
+
+
+def build_report(output, generated_on=None, processes=1):
+    """
+    Buduje raport PDF fragment po fragmencie: każda porcja wierszy jest osobno
+    renderowana do pliku tymczasowego, a na końcu pliki są łączone w ``output``.
+    W pamięci jest naraz tylko kilka porcji HTML zamiast całego raportu.
+
+    Przy ``processes`` > 1 fragmenty są renderowane równolegle w puli procesów.
+    """
+    generated_on = generated_on or timezone.now()
+    parts = iter_report_parts(generated_on)
+    with tempfile.TemporaryDirectory(prefix='raport-') as workdir:
+        if processes > 1:
+            paths = render_parts_parallel(parts, workdir, processes)
+        else:
+            paths = [
+                render_part(template_name, context, Path(workdir) / f"{index:05d}.pdf")
+                for index, (template_name, context) in enumerate(parts)
+            ]
+        merge_pdfs(paths, output)
+    return output
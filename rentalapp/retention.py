@@ -0,0 +1,232 @@
+import gzip
+import json
+import re
+import time
+from datetime import datetime, time as day_time, timedelta
+from itertools import groupby
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Trailer, TrailerLog, TrailerUptimeDaily
+from .sync import prune_tombstones
+
+RETENTION_DEFAULTS = {
+    'TTL_DAYS': {'ping': 30, 'status_change': 365},
+    'BATCH_SIZE': 500,
+    'PAUSE': 0.05,
+    'MAX_SECONDS': 20,
+    'INTERVAL': 3600,
+    'ARCHIVE_DIR': None,
+}
+
+TRANSITION_RE = re.compile(r"^Zmiana statusu \(ping\): (?P<old>.+) → (?P<new>.+)$")
+# Przejścia z pingów: dawniej logowane jako 'ping', obecnie jako 'status_change'.
+TRANSITION_EVENT_TYPES = ('ping', 'status_change')
+ROLLUP_BATCH = 1000
+ROLLUP_TRAILERS = 200
+
+
+def retention_settings():
+    """Ustawienia retencji z settings.TRAILER_LOG_RETENTION uzupełnione domyślnymi"""
+    config = {**RETENTION_DEFAULTS, **getattr(settings, 'TRAILER_LOG_RETENTION', {})}
+    config['ARCHIVE_DIR'] = Path(config['ARCHIVE_DIR'] or settings.BASE_DIR / 'archive')
+    return config
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, day_time.min))
+
+
+def cutoff_day(ttl_days, now=None):
+    """Pierwszy dzień, który jeszcze zostaje - granice retencji wyrównujemy do pełnych dni"""
+    return timezone.localdate(now or timezone.now()) - timedelta(days=ttl_days)
+
+
+def parse_transition(message, codes):
+    """'Zmiana statusu (ping): Aktywna → Nieaktywna' -> ('active', 'inactive')"""
+    match = TRANSITION_RE.search(message)
+    if not match:
+        return None
+    old, new = codes.get(match['old']), codes.get(match['new'])
+    return (old, new) if old and new else None
+
+
+def uptime_rows(trailer_id, status, transitions, first_day, end_day):
+    """
+    Dzienne podsumowania dla dni [first_day, end_day). ``status`` to stan na
+    początku first_day, ``transitions`` to posortowane [(czas, nowy_status)].
+    """
+    pending = iter(transitions)
+    upcoming = next(pending, None)
+    day = first_day
+    while day < end_day:
+        position, finish = day_start(day), day_start(day + timedelta(days=1))
+        uptime, count = 0.0, 0
+        while upcoming and upcoming[0] < finish:
+            moment, new_status = upcoming
+            if status == 'active':
+                uptime += (moment - position).total_seconds()
+            position, status = moment, new_status
+            count += 1
+            upcoming = next(pending, None)
+        if status == 'active':
+            uptime += (finish - position).total_seconds()
+        yield TrailerUptimeDaily(
+            trailer_id=trailer_id,
+            date=day,
+            uptime_seconds=round(uptime),
+            transitions=count,
+            last_status=status,
+        )
+        day += timedelta(days=1)
+
+
+def rollup_ping_logs(end_day, deadline=None):
+    """
+    Zamienia przejścia statusu z pingów sprzed end_day na dzienne podsumowania uptime.
+
+    Przyczepki bierzemy porcjami po ROLLUP_TRAILERS, a dla każdej czytamy tylko
+    logi z dni po jej ostatnim podsumowaniu, więc kolejne uruchomienia nie
+    przeglądają ponownie całej historii. Między porcjami sprawdzamy ``deadline``;
+    przerwane podsumowanie można bezpiecznie powtórzyć. Zwraca (liczba
+    podsumowań, czy przejrzano wszystkie przyczepki).
+    """
+    codes = {label: code for code, label in Trailer.STATUS_CHOICES}
+    created = 0
+    batch = []
+
+    def flush():
+        nonlocal created, batch
+        TrailerUptimeDaily.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+        batch = []
+
+    def add_rows(rows):
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= ROLLUP_BATCH:
+                flush()
+
+    last_id = 0
+    while True:
+        if deadline is not None and time.monotonic() >= deadline:
+            flush()
+            return created, False
+        trailer_ids = list(
+            Trailer.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:ROLLUP_TRAILERS]
+        )
+        if not trailer_ids:
+            break
+        last_id = trailer_ids[-1]
+
+        latest = TrailerUptimeDaily.objects.filter(trailer_id=OuterRef('trailer_id')).order_by('-date')
+        summaries = {
+            trailer_id: (date, last_status)
+            for trailer_id, date, last_status in (
+                TrailerUptimeDaily.objects
+                .filter(trailer_id__in=trailer_ids, pk=Subquery(latest.values('pk')[:1]))
+                .values_list('trailer_id', 'date', 'last_status')
+            )
+        }
+        new_ids = [trailer_id for trailer_id in trailer_ids if trailer_id not in summaries]
+        # podsumowane do końca okresu pomijamy - nie ma czego liczyć
+        previous = {
+            trailer_id: summary for trailer_id, summary in summaries.items()
+            if summary[0] + timedelta(days=1) < end_day
+        }
+
+        # dla przyczepek z podsumowaniem - tylko logi od dnia po nim (indeks trailer + timestamp)
+        by_day = {}
+        for trailer_id, (last_date, _) in previous.items():
+            by_day.setdefault(last_date, []).append(trailer_id)
+        scope = Q(trailer_id__in=new_ids)
+        for last_date, ids in by_day.items():
+            scope |= Q(trailer_id__in=ids, timestamp__gte=day_start(last_date + timedelta(days=1)))
+
+        logs = (
+            TrailerLog.objects
+            .filter(scope, event_type__in=TRANSITION_EVENT_TYPES, timestamp__lt=day_start(end_day))
+            .order_by('trailer_id', 'timestamp', 'id')
+            .values_list('trailer_id', 'timestamp', 'message')
+            .iterator(chunk_size=2000)
+        )
+        for trailer_id, entries in groupby(logs, key=lambda entry: entry[0]):
+            parsed = []
+            for _, timestamp, message in entries:
+                transition = parse_transition(message, codes)
+                if transition:
+                    parsed.append((timestamp, transition))
+            if not parsed:
+                continue
+
+            if trailer_id in previous:
+                last_date, status = previous.pop(trailer_id)
+                first_day = last_date + timedelta(days=1)
+            else:
+                first_day = timezone.localdate(parsed[0][0])
+                status = parsed[0][1][0]
+
+            transitions = [(timestamp, new) for timestamp, (_, new) in parsed]
+            add_rows(uptime_rows(trailer_id, status, transitions, first_day, end_day))
+
+        # Przyczepki bez nowych zmian: stan z ostatniego podsumowania trwa do końca okresu.
+        for trailer_id, (last_date, status) in previous.items():
+            add_rows(uptime_rows(trailer_id, status, [], last_date + timedelta(days=1), end_day))
+
+    flush()
+    return created, True
+
+
+def archive_rows(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, 'at', encoding='utf-8') as archive:
+        for row in rows:
+            archive.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n")
+
+
+def prune_trailer_logs(event_type, before, config, deadline):
+    """Archiwizuje i usuwa logi sprzed ``before`` małymi porcjami - każda w osobnej, krótkiej transakcji"""
+    archive_path = config['ARCHIVE_DIR'] / f"trailerlog-{event_type}-{timezone.localdate():%Y%m%d}.jsonl.gz"
+    expired = TrailerLog.objects.filter(event_type=event_type, timestamp__lt=before).order_by('timestamp', 'id')
+
+    deleted = 0
+    while time.monotonic() < deadline:
+        rows = list(expired.values('id', 'timestamp', 'trailer_id', 'event_type', 'message')[:config['BATCH_SIZE']])
+        if not rows:
+            break
+        archive_rows(archive_path, rows)
+        TrailerLog.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        deleted += len(rows)
+        time.sleep(config['PAUSE'])
+    return deleted
+
+
+def apply_retention(now=None, max_seconds=None):
+    """Podsumowuje stare pingi, archiwizuje i usuwa logi po czasie retencji. Zwraca opis do logu"""
+    config = retention_settings()
+    deadline = time.monotonic() + (max_seconds if max_seconds is not None else config['MAX_SECONDS'])
+
+    results = []
+    rollup_finished = True
+    ping_ttl = config['TTL_DAYS'].get('ping')
+    if ping_ttl is not None:
+        rolled_up, rollup_finished = rollup_ping_logs(cutoff_day(ping_ttl, now), deadline)
+        results.append(f"podsumowania dzienne: {rolled_up}" + ("" if rollup_finished else " (przerwane)"))
+
+    for event_type, ttl_days in config['TTL_DAYS'].items():
+        if ttl_days is None:
+            continue
+        if not rollup_finished and event_type in TRANSITION_EVENT_TYPES:
+            # przejść jeszcze niepodsumowanych nie usuwamy - dokończy następne uruchomienie
+            results.append(f"{event_type}: pominięto")
+            continue
+        before = day_start(cutoff_day(ttl_days, now))
+        deleted = prune_trailer_logs(event_type, before, config, deadline)
+        results.append(f"{event_type}: usunięto {deleted}")
+
+    results.append(f"znaczniki usunięć: {prune_tombstones(now)}")
+    return ", ".join(results)
@@ -0,0 +1,120 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import metrics, sync
+from .models import Company, Rental, RentalTrailer, ServiceHistory, Trailer, WarehouseItem
+from .versions import bump
+
+# Bez User - każde logowanie zapisuje last_login, a żadne dane w cache nie zależą od użytkowników.
+VERSIONED_MODELS = [Trailer, Company, Rental, RentalTrailer, WarehouseItem, ServiceHistory]
+
+# Pola, których poprzednia wartość jest potrzebna do przyrostowej zmiany metryk dashboardu.
+METRIC_FIELDS = {
+    Trailer: 'status',
+    Rental: 'start_date',
+    WarehouseItem: 'quantity',
+}
+NOT_SAVED = object()
+
+
+def bump_model_version(sender, **kwargs):
+    bump(sender._meta.model_name)
+
+
+# Odbiorniki łączymy tylko z konkretnymi modelami: odbiornik post_delete bez
+# ``sender`` wyłącza szybkie usuwanie (jeden DELETE bez wczytywania wierszy) dla wszystkich modeli.
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_model_version, sender=model)
+    post_delete.connect(bump_model_version, sender=model)
+
+
+def leave_tombstone(sender, instance, **kwargs):
+    sync.record_deletion(sender, instance.pk)
+
+
+for model in sync.SYNC_MODELS:
+    post_delete.connect(leave_tombstone, sender=model)
+
+
+def remember_metric_field(sender, instance, **kwargs):
+    """Wartość pola metryki z chwili wczytania obiektu - zapis nie potrzebuje już dodatkowego SELECT"""
+    instance._metric_previous = instance.__dict__.get(METRIC_FIELDS[sender]) if instance.pk else None
+
+
+# post_init wywołuje się dla każdego wczytanego obiektu - tylko dla modeli z metrykami.
+for model in METRIC_FIELDS:
+    post_init.connect(remember_metric_field, sender=model)
+
+
+def take_previous(sender, instance, update_fields):
+    """
+    Poprzednia wartość pola metryki; od teraz poprzednią jest wartość właśnie
+    zapisana. NOT_SAVED, gdy zapis pola nie obejmował (update_fields albo pole
+    odroczone przez .only()/.defer() - Django zapisuje wtedy tylko wczytane pola).
+    """
+    field = METRIC_FIELDS[sender]
+    if update_fields is not None and field not in update_fields:
+        return NOT_SAVED
+    previous = getattr(instance, '_metric_previous', None)
+    instance._metric_previous = getattr(instance, field)
+    return previous
+
+
+@receiver(post_save, sender=Trailer)
+def trailer_saved(sender, instance, created, update_fields=None, **kwargs):
+    previous = take_previous(sender, instance, update_fields)
+    if previous is NOT_SAVED:
+        return
+    was_inactive = not created and previous == 'inactive'
+    metrics.adjust(
+        total_trailers=int(created),
+        inactive_trailers=(instance.status == 'inactive') - was_inactive,
+    )
+
+
+@receiver(post_delete, sender=Trailer)
+def trailer_deleted(sender, instance, **kwargs):
+    metrics.adjust(total_trailers=-1, inactive_trailers=-(instance.status == 'inactive'))
+
+
+@receiver(post_save, sender=Rental)
+def rental_saved(sender, instance, created, update_fields=None, **kwargs):
+    previous = take_previous(sender, instance, update_fields)
+    if previous is NOT_SAVED:
+        return
+    if created or previous is None:
+        metrics.adjust_month(instance.start_date, 1)
+    elif metrics.month_start(previous) != metrics.month_start(instance.start_date):
+        metrics.adjust_month(previous, -1)
+        metrics.adjust_month(instance.start_date, 1)
+
+
+@receiver(post_delete, sender=Rental)
+def rental_deleted(sender, instance, **kwargs):
+    metrics.adjust_month(instance.start_date, -1)
+
+
+@receiver(post_save, sender=WarehouseItem)
+def warehouse_item_saved(sender, instance, created, update_fields=None, **kwargs):
+    previous = take_previous(sender, instance, update_fields)
+    if previous is NOT_SAVED:
+        return
+    was_low = previous is not None and previous < metrics.LOW_STOCK_THRESHOLD
+    metrics.adjust(items_below_5=(instance.quantity < metrics.LOW_STOCK_THRESHOLD) - was_low)
+
+
+@receiver(post_delete, sender=WarehouseItem)
+def warehouse_item_deleted(sender, instance, **kwargs):
+    metrics.adjust(items_below_5=-(instance.quantity < metrics.LOW_STOCK_THRESHOLD))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        metrics.adjust(total_users=1)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    metrics.adjust(total_users=-1)
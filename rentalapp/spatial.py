@@ -0,0 +1,173 @@
+import threading
+
+import numpy as np
+
+from . import versions
+from .models import Trailer
+
+EARTH_RADIUS_KM = 6371.0088
+LEAF_SIZE = 32
+
+
+def to_unit_vectors(latitudes, longitudes):
+    """Współrzędne geograficzne -> punkty na sferze jednostkowej (x, y, z)"""
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord):
+    """Odległość w linii prostej między punktami sfery jednostkowej -> odległość po powierzchni Ziemi"""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+def km_to_chord(km):
+    return 2 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+class TrailerTree:
+    """
+    KD-drzewo przyczepek na punktach 3D sfery jednostkowej - odległość euklidesowa
+    rośnie tam razem z odległością po powierzchni, więc nie ma problemu biegunów
+    i południka 180°. Liście (do LEAF_SIZE punktów) są ciągłymi wycinkami tablic,
+    więc odległości w liściu liczy NumPy jednym wywołaniem.
+    """
+
+    def __init__(self, ids, latitudes, longitudes):
+        points = to_unit_vectors(latitudes, longitudes).reshape(-1, 3)
+        order = np.arange(len(points))
+        # węzeł: [wymiar, podział, lewy, prawy] albo liść: [-1, 0, początek, koniec]
+        self._nodes = []
+        self._build(points, order, 0, len(order))
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.points = points[order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _build(self, points, order, start, end):
+        node = len(self._nodes)
+        self._nodes.append(None)
+        if end - start <= LEAF_SIZE:
+            self._nodes[node] = (-1, 0.0, start, end)
+            return node
+        chunk = points[order[start:end]]
+        dim = int(np.argmax(chunk.max(axis=0) - chunk.min(axis=0)))
+        middle = (end - start) // 2
+        partition = np.argpartition(chunk[:, dim], middle)
+        order[start:end] = order[start:end][partition]
+        split = float(points[order[start + middle], dim])
+        left = self._build(points, order, start, start + middle)
+        right = self._build(points, order, start + middle, end)
+        self._nodes[node] = (dim, split, left, right)
+        return node
+
+    def nearest(self, latitude, longitude, k=10):
+        """k najbliższych przyczepek: [(id, odległość_km)] od najbliższej"""
+        if not len(self) or k <= 0:
+            return []
+        query = to_unit_vectors([latitude], [longitude])[0]
+        best_ids = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0)
+
+        def visit(node):
+            nonlocal best_ids, best_dist
+            dim, split, first, second = self._nodes[node]
+            if dim < 0:
+                dist = np.sum((self.points[first:second] - query) ** 2, axis=1)
+                best_ids = np.concatenate((best_ids, self.ids[first:second]))
+                best_dist = np.concatenate((best_dist, dist))
+                if len(best_dist) > k:
+                    keep = np.argpartition(best_dist, k - 1)[:k]
+                    best_ids, best_dist = best_ids[keep], best_dist[keep]
+                return
+            offset = query[dim] - split
+            near, far = (second, first) if offset >= 0 else (first, second)
+            visit(near)
+            if len(best_dist) < k or offset * offset <= best_dist.max():
+                visit(far)
+
+        visit(0)
+        order = np.argsort(best_dist)
+        distances = chord_to_km(np.sqrt(best_dist[order]))
+        return list(zip(best_ids[order].tolist(), distances.tolist()))
+
+    def within(self, latitude, longitude, radius_km):
+        """Przyczepki w promieniu ``radius_km``: [(id, odległość_km)] od najbliższej"""
+        if not len(self):
+            return []
+        query = to_unit_vectors([latitude], [longitude])[0]
+        limit = km_to_chord(radius_km) ** 2
+        found_ids, found_dist = [], []
+        stack = [0]
+        while stack:
+            dim, split, first, second = self._nodes[stack.pop()]
+            if dim < 0:
+                dist = np.sum((self.points[first:second] - query) ** 2, axis=1)
+                mask = dist <= limit
+                found_ids.append(self.ids[first:second][mask])
+                found_dist.append(dist[mask])
+                continue
+            offset = query[dim] - split
+            near, far = (second, first) if offset >= 0 else (first, second)
+            stack.append(near)
+            if offset * offset <= limit:
+                stack.append(far)
+        ids, dist = np.concatenate(found_ids), np.concatenate(found_dist)
+        order = np.argsort(dist)
+        return list(zip(ids[order].tolist(), chord_to_km(np.sqrt(dist[order])).tolist()))
+
+
+_lock = threading.Lock()
+_tree = (None, None)
+
+
+def trailer_tree():
+    """
+    Drzewo dla bieżącej wersji danych przyczepek - budowane ponownie w procesie
+    dopiero, gdy sygnał (albo zbiorczy zapis statusów) podbije wersję 'trailer'.
+    """
+    global _tree
+    version = versions.get_versions('trailer')['trailer']
+    built_for, tree = _tree
+    if built_for == version:
+        return tree
+    with _lock:
+        built_for, tree = _tree
+        if built_for != version:
+            rows = list(
+                Trailer.objects
+                .exclude(latitude=None).exclude(longitude=None)
+                .values_list('id', 'latitude', 'longitude')
+            )
+            ids, latitudes, longitudes = zip(*rows) if rows else ((), (), ())
+            tree = TrailerTree(ids, latitudes, longitudes)
+            _tree = (version, tree)
+    return tree
+
+
+def nearest_trailers(latitude, longitude, k=10, radius_km=None, accept=None):
+    """
+    Najbliższe przyczepki [(id, odległość_km)]: k najbliższych albo wszystkie w promieniu.
+    ``accept(ids)`` zwraca zbiór id spełniających dodatkowe warunki (np. dostępność);
+    przy k najbliższych dobieramy kolejnych kandydatów, aż będzie ich dość.
+    """
+    tree = trailer_tree()
+    if radius_km is not None:
+        found = tree.within(latitude, longitude, radius_km)
+        if accept is not None:
+            accepted = accept([trailer_id for trailer_id, _ in found])
+            found = [item for item in found if item[0] in accepted]
+        return found[:k] if k else found
+
+    candidates = k
+    while True:
+        found = tree.nearest(latitude, longitude, candidates)
+        if accept is not None:
+            accepted = accept([trailer_id for trailer_id, _ in found])
+            matching = [item for item in found if item[0] in accepted]
+        else:
+            matching = found
+        if len(matching) >= k or len(found) < candidates:
+            return matching[:k]
+        candidates *= 4
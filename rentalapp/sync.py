@@ -0,0 +1,152 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Company, Rental, RentalTrailer, Tombstone, Trailer, WarehouseItem
+from .pagination import apaginate, decode_cursor, encode_cursor
+
+SYNC_DEFAULTS = {
+    'TOMBSTONE_DAYS': 30,
+    'PAGE_SIZE': 500,
+    'MAX_PAGE_SIZE': 5000,
+    'SAFETY_MARGIN': 60,
+}
+
+# Sekcje odpowiedzi /sync/: nazwa -> (model, pola). Kolejność jest częścią formatu kursora.
+SECTIONS = {
+    'trailers': (Trailer, ['id', 'name', 'status', 'serial_number', 'registration_number', 'ip_address',
+                           'operator_phone', 'location_link', 'latitude', 'longitude', 'notes', 'updated_at']),
+    'companies': (Company, ['id', 'name', 'email', 'phone', 'updated_at']),
+    'rentals': (Rental, ['id', 'name', 'company_id', 'start_date', 'end_date', 'monthly_price', 'cost',
+                         'created_at', 'updated_at']),
+    'rental-trailers': (RentalTrailer, ['id', 'rental_id', 'trailer_id', 'start_date', 'end_date', 'updated_at']),
+    'warehouse-items': (WarehouseItem, ['id', 'name', 'quantity', 'date_state', 'comment', 'updated_at']),
+}
+SYNC_MODELS = {model: name for name, (model, _) in SECTIONS.items()}
+ORDERING = ['updated_at', 'id']
+TOMBSTONE_ORDERING = ['deleted_at', 'id']
+
+
+class CursorExpired(Exception):
+    """Kursor starszy niż przechowywane znaczniki usunięć - klient musi pobrać wszystko od nowa"""
+
+
+def sync_settings():
+    """Ustawienia synchronizacji z settings.SYNC uzupełnione domyślnymi"""
+    return {**SYNC_DEFAULTS, **getattr(settings, 'SYNC', {})}
+
+
+def record_deletion(model, pk):
+    Tombstone.objects.create(model=SYNC_MODELS[model], object_id=pk)
+
+
+def prune_tombstones(now=None):
+    """Usuwa znaczniki starsze niż TOMBSTONE_DAYS; zwraca ich liczbę"""
+    before = (now or timezone.now()) - timedelta(days=sync_settings()['TOMBSTONE_DAYS'])
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=before).delete()
+    return deleted
+
+
+def valid_position(position):
+    """Pozycja w kursorze: None albo [czas ISO, id]"""
+    if position is None:
+        return True
+    if not isinstance(position, list) or len(position) != 2:
+        return False
+    moment, pk = position
+    try:
+        return isinstance(moment, str) and parse_datetime(moment) is not None and type(pk) is int
+    except ValueError:
+        return False
+
+
+def read_cursor(cursor):
+    """
+    Kursor to [początek ostatniej pełnej synchronizacji, pozycja znaczników,
+    pozycje sekcji...], a każda pozycja to [updated_at, id] ostatniego wysłanego
+    wiersza. ValueError dla uszkodzonego kursora, CursorExpired dla zbyt starego.
+    """
+    values = decode_cursor(cursor)
+    if values is None or len(values) != len(SECTIONS) + 2:
+        raise ValueError("Niepoprawny kursor.")
+    synced_at = parse_datetime(values[0]) if isinstance(values[0], str) else None
+    positions = values[1:]
+    if synced_at is None or not all(valid_position(position) for position in positions):
+        raise ValueError("Niepoprawny kursor.")
+    if synced_at < timezone.now() - timedelta(days=sync_settings()['TOMBSTONE_DAYS']):
+        raise CursorExpired()
+    return synced_at, positions[0], positions[1:]
+
+
+def next_position(rows, ordering, position, horizon):
+    """
+    Pozycja kursora po wysłanych wierszach, ale nie dalej niż ``horizon``.
+    updated_at (i deleted_at) ustawiamy przed zatwierdzeniem transakcji, więc
+    wiersz z wcześniejszym czasem może stać się widoczny dopiero po naszym
+    zapytaniu - świeższe wiersze wysyłamy, ale kursor zostaje przed nimi
+    i następna synchronizacja wyśle je ponownie. Zwraca (pozycja, czy przesunięta do końca strony).
+    """
+    if not rows:
+        return position, True
+    last = [rows[-1][key] for key in ordering]
+    if last[0] <= horizon:
+        return last, True
+    return [horizon, 0], False
+
+
+async def changes_since(cursor=None, limit=None):
+    """
+    Zmiany od kursora: w każdej sekcji do ``limit`` wierszy zmienionych lub dodanych
+    po zapamiętanej pozycji (indeks na updated_at) oraz identyfikatory usuniętych.
+    Bez kursora - wszystkie wiersze, a znaczniki usunięć dopiero od teraz
+    (z marginesem SAFETY_MARGIN, patrz next_position).
+
+    Horyzont (początek zapytania minus margines) trafia do kursora tylko wtedy, gdy
+    niczego nie ucięto limitem: wszystkie wcześniejsze usunięcia klient już wtedy dostał, więc jego
+    kursor jest ważny tak długo, jak przechowujemy znaczniki (TOMBSTONE_DAYS).
+    """
+    started_at = timezone.now()
+    horizon = started_at - timedelta(seconds=sync_settings()['SAFETY_MARGIN'])
+    if cursor:
+        synced_at, tombstone_position, positions = read_cursor(cursor)
+    else:
+        synced_at = horizon
+        tombstone_position = [horizon, 0]
+        positions = [None] * len(SECTIONS)
+
+    has_more = False
+    changes, new_positions = {}, []
+    for (name, (model, fields)), position in zip(SECTIONS.items(), positions):
+        page = await apaginate(
+            model.objects.values(*fields),
+            ORDERING,
+            cursor=encode_cursor(position) if position else None,
+            per_page=limit,
+        )
+        # Gdy strona kończy się za horyzontem, kursor stoi w miejscu - "has_more" zapętliłoby klienta,
+        # a resztę dostanie, gdy horyzont się przesunie.
+        new_position, advanced = next_position(page.object_list, ORDERING, position, horizon)
+        has_more |= page.has_next and advanced
+        changes[name] = page.object_list
+        new_positions.append(new_position)
+
+    page = await apaginate(
+        Tombstone.objects.values('model', 'object_id', *TOMBSTONE_ORDERING),
+        TOMBSTONE_ORDERING,
+        cursor=encode_cursor(tombstone_position) if tombstone_position else None,
+        per_page=limit,
+    )
+    tombstone_position, advanced = next_position(page.object_list, TOMBSTONE_ORDERING, tombstone_position, horizon)
+    has_more |= page.has_next and advanced
+    deleted = {name: [] for name in SECTIONS}
+    for tombstone in page:
+        deleted[tombstone['model']].append(tombstone['object_id'])
+
+    return {
+        'changes': changes,
+        'deleted': deleted,
+        'has_more': has_more,
+        'cursor': encode_cursor([synced_at if has_more else horizon, tombstone_position, *new_positions]),
+    }
@@ -0,0 +1,60 @@
+import asyncio
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rentalapp.events import broadcaster, event_stream
+from rentalapp.models import Trailer, TrailerLog
+
+from .test_rent import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TrailerEventsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('tester')
+        self.trailer = Trailer.objects.create(name="P1", ip_address="10.0.0.1", serial_number="SN1",
+                                              registration_number="R1", operator_phone="500")
+
+    def test_no_stream_under_wsgi(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('rentalapp:trailer_events')).status_code, 204)
+        page = self.client.get(reverse('rentalapp:trailer_list')).content.decode()
+        self.assertNotIn("TrailerEvents.subscribe(", page)
+
+    @override_settings(TRAILER_EVENTS={'POLL_INTERVAL': 0.01, 'HEARTBEAT': 60, 'MAX_DURATION': 5})
+    async def test_connections_share_one_poller(self):
+        streams = [event_stream(0), event_stream(0, self.trailer.pk), event_stream(0, self.trailer.pk + 1)]
+        for stream in streams:
+            self.assertTrue((await anext(stream)).startswith("retry:"))
+        self.assertEqual(len(broadcaster.subscribers), 3)
+        pending = [asyncio.ensure_future(anext(stream)) for stream in streams]
+
+        log = await TrailerLog.objects.acreate(
+            trailer=self.trailer, event_type='status_change', message="Zmiana statusu (ping): Aktywna → Nieaktywna")
+        for future in pending[:2]:
+            message = await asyncio.wait_for(future, 2)
+            self.assertIn(f"id: {log.pk}\nevent: status\n", message)
+        await asyncio.sleep(0.05)
+        self.assertFalse(pending[2].done())
+
+        pending[2].cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending[2]
+        for stream in streams:
+            await stream.aclose()
+        self.assertFalse(broadcaster.subscribers)
+        self.assertIsNone(broadcaster.task)
+
+    @override_settings(TRAILER_EVENTS={'POLL_INTERVAL': 0.01})
+    async def test_poller_starts_from_first_subscriber_position(self):
+        # wpis zapisany po doczytaniu połączenia, zanim zadanie pierwszy raz odpytało log
+        log = await TrailerLog.objects.acreate(
+            trailer=self.trailer, event_type='status_change', message="Zmiana statusu (ping): Aktywna → Nieaktywna")
+        subscription = broadcaster.subscribe(log.pk - 1)
+        try:
+            events = await asyncio.wait_for(subscription.queue.get(), 2)
+            self.assertEqual([event_id for event_id, _ in events], [log.pk])
+        finally:
+            broadcaster.unsubscribe(subscription)
@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rentalapp.models import Trailer
+
+from .test_rent import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MapClustersTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('tester'))
+        for i, (lat, lon, status) in enumerate([(52.23, 21.01, 'active'), (52.24, 21.02, 'inactive'),
+                                                 (50.06, 19.94, 'maintenance')]):
+            Trailer.objects.create(name=f"P{i}", ip_address=f"10.0.0.{i + 1}", serial_number=f"SN{i}",
+                                   registration_number=f"R{i}", operator_phone="500",
+                                   latitude=lat, longitude=lon, status=status)
+
+    def test_single_trailer_group_has_status(self):
+        response = self.client.get(reverse('rentalapp:map_trailers'), {'bbox': '14,49,24,55', 'zoom': 6})
+        features = [feature['properties'] for feature in response.json()['features']]
+        self.assertIn({'cluster': True, 'count': 2}, features)
+        self.assertIn({'cluster': False, 'id': Trailer.objects.get(name="P2").pk, 'name': "P2",
+                       'status': 'maintenance'}, features)
@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rentalapp import metrics
+from rentalapp.models import Company, DashboardMetrics, MonthlyRentalCount, Rental, Trailer, WarehouseItem
+
+from .test_rent import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class IncrementalMetricsTest(TestCase):
+    def setUp(self):
+        metrics.rebuild_metrics()
+
+    def assertMatchesRebuild(self):
+        incremental = DashboardMetrics.objects.values().get(pk=metrics.METRICS_PK)
+        monthly = dict(MonthlyRentalCount.objects.filter(count__gt=0).values_list('month', 'count'))
+        metrics.rebuild_metrics()
+        rebuilt = DashboardMetrics.objects.values().get(pk=metrics.METRICS_PK)
+        for field in ('total_trailers', 'inactive_trailers', 'items_below_5', 'total_users'):
+            self.assertEqual(incremental[field], rebuilt[field], field)
+        self.assertEqual(monthly, dict(MonthlyRentalCount.objects.values_list('month', 'count')))
+
+    def test_repeated_saves_of_one_instance(self):
+        trailer = Trailer.objects.create(name="P1", ip_address="10.0.0.1", serial_number="SN1",
+                                         registration_number="R1", operator_phone="500")
+        for status in ('inactive', 'inactive', 'active', 'inactive'):
+            trailer.status = status
+            trailer.save()
+        item = WarehouseItem.objects.create(name="Opona", quantity=10, date_state=date(2024, 1, 1))
+        for quantity in (2, 3, 8):
+            item.quantity = quantity
+            item.save()
+        rental = Rental.objects.create(company=Company.objects.create(name="Firma"), start_date=date(2024, 1, 5),
+                                       end_date=date(2024, 2, 5), monthly_price=100)
+        rental.start_date = date(2024, 3, 1)
+        rental.save()
+        self.assertMatchesRebuild()
+
+    def test_loaded_and_partial_saves(self):
+        Trailer.objects.create(name="P1", ip_address="10.0.0.1", serial_number="SN1",
+                               registration_number="R1", operator_phone="500", status='inactive')
+        trailer = Trailer.objects.get()
+        trailer.status = 'active'
+        trailer.save(update_fields=['status'])
+
+        deferred = Trailer.objects.only('name').get()
+        deferred.name = "P1a"
+        deferred.save()
+
+        trailer = Trailer.objects.get()
+        trailer.status = 'inactive'
+        trailer.save(update_fields=['name'])
+        self.assertMatchesRebuild()
+
+    def test_save_does_not_read_previous_value(self):
+        trailer = Trailer.objects.create(name="P1", ip_address="10.0.0.1", serial_number="SN1",
+                                         registration_number="R1", operator_phone="500")
+        trailer.status = 'inactive'
+        with CaptureQueriesContext(connection) as queries:
+            trailer.save()
+        self.assertEqual([query['sql'].split()[0] for query in queries], ['UPDATE', 'UPDATE'])
+        self.assertMatchesRebuild()
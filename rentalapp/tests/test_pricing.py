@@ -0,0 +1,122 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from rentalapp.models import Company, Rental, RentalTrailer, Trailer
+from rentalapp.pricing import (
+    RentalBatch, costs_in_period, from_cents, monthly_revenue, rental_cost, revenue_by_month, split_cents, to_cents,
+)
+
+from .test_rent import TEST_CACHES
+
+
+def random_rows(count, seed=1):
+    rng = random.Random(seed)
+    rows = []
+    for pk in range(1, count + 1):
+        start = date(2023, 1, 1) + timedelta(days=rng.randrange(700))
+        end = start + timedelta(days=rng.randrange(120))
+        rows.append((pk, rng.randrange(1, 6), start, end, Decimal(rng.randrange(100, 500000)) / 100))
+    return rows
+
+
+class RentalBatchCostsTest(SimpleTestCase):
+    def assertMatchesRentalCost(self, rows):
+        costs = RentalBatch.from_rows(rows).costs()
+        expected = [to_cents(rental_cost(start, end, price)) for _, _, start, end, price in rows]
+        self.assertEqual(costs.tolist(), expected)
+
+    def test_random_rentals(self):
+        self.assertMatchesRentalCost(random_rows(2000))
+
+    def test_half_cent_cases(self):
+        # dni * grosze daje resztę 15 z 30: cena podzielna przez 3 (dokładnie) i niepodzielna (przez rental_cost)
+        start = date(2024, 1, 1)
+        rows = [
+            (1, 1, start, start + timedelta(days=2), Decimal('12.35')),
+            (2, 1, start, start + timedelta(days=2), Decimal('0.05')),
+            (3, 1, start, start, Decimal('1.05')),
+            (4, 1, start, start + timedelta(days=2), Decimal('1.05')),
+            (5, 1, start, start + timedelta(days=8), Decimal('4321.55')),
+        ]
+        batch = RentalBatch.from_rows(rows)
+        self.assertTrue(all(days * price % 30 == 15 for days, price in zip(batch.days(), batch.price_cents)))
+        self.assertMatchesRentalCost(rows)
+
+
+class SplitCentsTest(SimpleTestCase):
+    def test_parts_add_up_and_follow_weights(self):
+        rng = np.random.default_rng(3)
+        groups = np.sort(rng.integers(0, 50, 1000))
+        totals = rng.integers(0, 10 ** 6, 50)
+        weights = rng.integers(1, 31, 1000)
+        parts = split_cents(totals, weights, groups)
+        for group in range(50):
+            mask = groups == group
+            self.assertEqual(parts[mask].sum(), totals[group] if mask.any() else 0)
+            if mask.any():
+                exact = totals[group] * weights[mask] / weights[mask].sum()
+                self.assertTrue(np.all(np.abs(parts[mask] - exact) < 1))
+
+
+class MonthlyRevenueTest(SimpleTestCase):
+    def test_months_add_up_to_rental_cost(self):
+        rows = random_rows(500, seed=2)
+        batch = RentalBatch.from_rows(rows)
+        rental_rows, _, cents = monthly_revenue(batch)
+        per_rental = np.bincount(rental_rows, weights=cents, minlength=len(batch)).astype(np.int64)
+        self.assertEqual(per_rental.tolist(), [to_cents(rental_cost(*row[2:])) for row in rows])
+        self.assertEqual(sum(revenue_by_month(batch).values()),
+                         sum(rental_cost(*row[2:]) for row in rows))
+
+    def test_month_split_by_days(self):
+        # 31 dni: 10 w styczniu i 21 w lutym
+        rows = [(1, 1, date(2024, 1, 22), date(2024, 2, 21), Decimal('3000.00'))]
+        self.assertEqual(revenue_by_month(RentalBatch.from_rows(rows)), {
+            date(2024, 1, 1): Decimal('1000.00'),
+            date(2024, 2, 1): Decimal('2100.00'),
+        })
+
+    def test_costs_in_period(self):
+        rows = [(1, 1, date(2023, 12, 22), date(2024, 1, 21), Decimal('3000.00'))]
+        batch = RentalBatch.from_rows(rows)
+        self.assertEqual(from_cents(costs_in_period(batch, date(2024, 1, 1), date(2024, 12, 31))[0]),
+                         Decimal('2100.00'))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RevenueReportTest(TestCase):
+    def test_sections_reconcile(self):
+        companies = [Company.objects.create(name=f"Firma {i}") for i in range(3)]
+        trailers = [
+            Trailer.objects.create(name=f"P{i}", ip_address=f"10.0.0.{i + 1}", serial_number=f"SN{i}",
+                                   registration_number=f"R{i}", operator_phone="500")
+            for i in range(3)
+        ]
+        periods = [
+            (date(2023, 11, 15), date(2024, 2, 10)),
+            (date(2024, 3, 1), date(2024, 3, 31)),
+            (date(2024, 12, 1), date(2025, 1, 31)),
+        ]
+        for i, (start, end) in enumerate(periods):
+            rental = Rental.objects.create(company=companies[i], start_date=start, end_date=end,
+                                           monthly_price=Decimal('1234.56'))
+            RentalTrailer.objects.create(rental=rental, trailer=trailers[i])
+
+        output = StringIO()
+        call_command('revenue_report', year=2024, top=100, stdout=output)
+        lines = output.getvalue().splitlines()
+
+        def amounts(section, end=None):
+            start = lines.index(section) + 1
+            stop = lines.index(end) if end else len(lines)
+            return [Decimal(line.rsplit(':', 1)[1].split()[0]) for line in lines[start:stop]]
+
+        year_total = Decimal(next(line for line in lines if 'razem' in line).split(':')[1].split()[0])
+        self.assertEqual(sum(amounts("Firmy:", "Przyczepki:")), year_total)
+        self.assertEqual(sum(amounts("Przyczepki:")), year_total)
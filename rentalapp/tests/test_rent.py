@@ -0,0 +1,106 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rentalapp.models import Company, Rental, RentalTrailer, Trailer
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-shared'},
+    'views': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-views'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RentViewQueriesTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('tester'))
+
+    def add_companies(self, count):
+        today = timezone.localdate()
+        for i in range(count):
+            company = Company.objects.create(name=f"Firma {Company.objects.count() + 1}")
+            Rental.objects.create(company=company, start_date=today - timedelta(days=10 + i),
+                                  end_date=today + timedelta(days=5), monthly_price=1500)
+            Rental.objects.create(company=company, start_date=today - timedelta(days=90),
+                                  end_date=today - timedelta(days=60), monthly_price=900)
+
+    def rent_view_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('rentalapp:rent'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_companies(self):
+        self.add_companies(2)
+        baseline = self.rent_view_queries()
+
+        self.add_companies(20)
+        with self.assertNumQueries(baseline):
+            response = self.client.get(reverse('rentalapp:rent'))
+        self.assertEqual(len(response.context['companies']), 22)
+
+    def test_annotations(self):
+        self.add_companies(1)
+        response = self.client.get(reverse('rentalapp:rent'))
+        company = response.context['companies'][0]
+        self.assertEqual(company.rental_count, 2)
+        self.assertEqual(company.active_rental_count, 1)
+        self.assertEqual(company.last_rental_date, timezone.localdate() - timedelta(days=10))
+        self.assertEqual(company.total_cost, sum(Rental.objects.values_list('cost', flat=True)))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CompanyListCacheTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('tester'))
+        Company.objects.create(name="Firma")
+        caches['views'].clear()
+
+    def test_invalid_cursors_share_the_first_page_entry(self):
+        url = reverse('rentalapp:company_list')
+        self.client.get(url)
+        entries = len(caches['views']._cache)
+        for cursor in ("garbage", "WyJ4IiwieSJd", "WzEsMiwzXQ"):
+            self.assertEqual(self.client.get(url, {'cursor': cursor}).status_code, 200)
+        self.assertEqual(len(caches['views']._cache), entries)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BulkAssignRequestTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('tester'))
+        today = timezone.localdate()
+        self.rental = Rental.objects.create(company=Company.objects.create(name="Firma"), start_date=today,
+                                            end_date=today + timedelta(days=10), monthly_price=1000)
+        self.trailers = [
+            Trailer.objects.create(name=f"P{i}", ip_address=f"10.0.0.{i + 1}", serial_number=f"SN{i}",
+                                   registration_number=f"R{i}", operator_phone="500")
+            for i in range(2)
+        ]
+
+    def assign(self, data):
+        return self.client.post(reverse('rentalapp:bulk_assign_trailers', args=[self.rental.pk]),
+                                json.dumps(data), content_type='application/json')
+
+    def test_non_integer_ids_are_rejected(self):
+        for ids in ([self.trailers[0].pk + 0.5], [True], ["1.5"], [-1], {"a": 1}):
+            with self.subTest(ids=ids):
+                self.assertEqual(self.assign({'trailer_ids': ids}).status_code, 400)
+        self.assertFalse(RentalTrailer.objects.exists())
+
+    def test_ids_and_count_together_are_rejected(self):
+        response = self.assign({'trailer_ids': [self.trailers[0].pk], 'count': 1})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ids_as_numbers_or_digit_strings(self):
+        response = self.assign({'trailer_ids': [self.trailers[0].pk, str(self.trailers[1].pk)]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['accepted']), 2)
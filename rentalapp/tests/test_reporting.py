@@ -0,0 +1,49 @@
+from datetime import date
+
+from django.template.loader import get_template
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rentalapp.models import Company, Rental, ServiceHistory, Trailer, WarehouseItem
+from rentalapp.reporting import build_report_sections, iter_report_parts
+
+from .test_rent import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ReportQueriesTest(TestCase):
+    def add_data(self, count):
+        offset = Trailer.objects.count()
+        for i in range(offset, offset + count):
+            trailer = Trailer.objects.create(
+                name=f"Przyczepka {i}", ip_address=f"10.0.0.{i + 1}", serial_number=f"SN{i}",
+                registration_number=f"REG{i}", operator_phone="500000000",
+            )
+            company = Company.objects.create(name=f"Firma {i}")
+            Rental.objects.create(company=company, start_date=date(2024, 1, 1), end_date=date(2024, 2, 1),
+                                  monthly_price=1000)
+            ServiceHistory.objects.create(trailer=trailer, service_date=date(2024, 3, 1),
+                                          description="Przegląd", cost=200)
+            WarehouseItem.objects.create(name=f"Część {i}", quantity=i, date_state=date(2024, 3, 1))
+
+    def render_report(self):
+        """Wypełnia wszystkie szablony raportu tak jak build_report, bez konwersji do PDF"""
+        return [
+            get_template(template_name).render(context)
+            for template_name, context in iter_report_parts(timezone.now())
+        ]
+
+    def test_one_query_per_section(self):
+        self.add_data(3)
+        with self.assertNumQueries(len(build_report_sections())):
+            self.render_report()
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_data(2)
+        with self.assertNumQueries(len(build_report_sections())):
+            small = self.render_report()
+        self.add_data(25)
+        with self.assertNumQueries(len(build_report_sections())):
+            large = self.render_report()
+        self.assertEqual(len(small), len(large))
+        self.assertIn("Firma 26", "".join(large))
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rentalapp.models import Company, Tombstone, Trailer, TrailerLog
+from rentalapp.pagination import encode_cursor
+from rentalapp.sync import SECTIONS
+
+from .test_rent import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SyncViewTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('tester'))
+
+    def sync(self, since=None):
+        return self.client.get(reverse('rentalapp:sync'), {'since': since} if since else {})
+
+    def test_tampered_positions_are_rejected(self):
+        synced_at = timezone.now() - timedelta(hours=1)
+        for position in (["garbage", 1], [synced_at.isoformat(), "1"], ["2024-02-30T10:00:00", 1], [1, 2, 3]):
+            cursor = encode_cursor([synced_at, None, position] + [None] * (len(SECTIONS) - 1))
+            with self.subTest(position=position):
+                self.assertEqual(self.sync(cursor).status_code, 400)
+
+    @override_settings(SYNC={'SAFETY_MARGIN': 0})
+    def test_cursor_round_trip(self):
+        Company.objects.create(name="Firma")
+        first = self.sync().json()
+        self.assertEqual([row['name'] for row in first['changes']['companies']], ["Firma"])
+        self.assertEqual(self.sync(first['cursor']).json()['changes']['companies'], [])
+
+    def test_late_commit_within_margin_is_sent(self):
+        Company.objects.create(name="Wcześniejsza")
+        cursor = self.sync().json()['cursor']
+        # wiersz, którego updated_at jest starszy niż ostatnia synchronizacja (zatwierdzony później)
+        late = Company.objects.create(name="Spóźniona")
+        Company.objects.filter(pk=late.pk).update(updated_at=timezone.now() - timedelta(seconds=5))
+        names = [row['name'] for row in self.sync(cursor).json()['changes']['companies']]
+        self.assertIn("Spóźniona", names)
+
+    def test_deletions_within_margin_are_sent_to_new_clients(self):
+        company = Company.objects.create(name="Usunięta")
+        company_id = company.pk
+        company.delete()
+        self.assertEqual(self.sync().json()['deleted']['companies'], [company_id])
+
+
+class FastDeleteTest(TestCase):
+    def test_bulk_deletes_of_unsynced_models_skip_signals(self):
+        trailer = Trailer.objects.create(name="P1", ip_address="10.0.0.1", serial_number="SN1",
+                                         registration_number="R1", operator_phone="500")
+        TrailerLog.objects.bulk_create(TrailerLog(trailer=trailer, event_type='ping', message="") for _ in range(5))
+        with CaptureQueriesContext(connection) as queries:
+            TrailerLog.objects.all().delete()
+            Tombstone.objects.all().delete()
+        self.assertEqual([query['sql'].split()[0] for query in queries], ['DELETE', 'DELETE'])
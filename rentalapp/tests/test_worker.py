@@ -0,0 +1,22 @@
+import time
+
+from django.test import TransactionTestCase
+
+from rentalapp.worker import Lease, PeriodicJob, Worker
+
+
+class LeaseHeartbeatTest(TransactionTestCase):
+    def test_lease_is_renewed_while_a_long_job_runs(self):
+        rival = Lease('test-lease', ttl=0.3)
+        taken_by_rival = []
+
+        def long_job():
+            for _ in range(5):
+                time.sleep(0.15)
+                taken_by_rival.append(rival.acquire())
+
+        worker = Worker(jobs=[PeriodicJob('long', 3600, long_job)], lease=Lease('test-lease', ttl=0.3),
+                        log=lambda message: None)
+        worker.run_pending()
+        self.assertTrue(worker.is_leader)
+        self.assertEqual(taken_by_rival, [False] * 5)
@@ -12,6 +12,7 @@ urlpatterns = [
     # Pozostałe widoki
     path('dashboard/', views.dashboard_view, name='dashboard'),
     path('map/', views.map_view, name='map_view'),
+    path('map/trailers/', views.map_trailers, name='map_trailers'),
     path('history/', views.history_view, name='history'),
     path('assign-role/', views.assign_role, name='assign_role'),
     path('rental-history/', views.rental_history_view, name='rental_history'),
@@ -20,22 +21,28 @@ urlpatterns = [
     path('rent/', views.rent_view, name='rent'),
     path('rent/company/<int:pk>/', views.company_rent_detail, name='company_rent_detail'),
     path('trailer/<int:pk>/', views.trailer_detail, name='trailer_detail'),
+    path('rental/<int:pk>/assign/', views.bulk_assign_trailers, name='bulk_assign_trailers'),
     path('rent/add/', views.add_rental, name='add_rental'),
     path('company/add/', views.add_company, name='add_company'),
     path('company/delete/<int:pk>/', views.delete_company, name='delete_company'),
     path('rental/delete/<int:pk>/', views.delete_rental, name='delete_rental'),
     path('companies/', views.company_list_view, name='company_list'),
+    path('rent/export/', views.rentals_export, name='rentals_export'),
 
     # Serwisy
     path('trailer/<int:pk>/service/', views.send_for_service, name='send_for_service'),
     path('service/active/', views.active_services_view, name='active_services_view'),
     path('service/done/<int:pk>/', views.mark_service_done, name='mark_service_done'),
     path('service-history/', views.service_history_view, name='service_history_view'),
+    path('service-history/export/', views.service_history_export, name='service_history_export'),
 
     # Widoki dotyczące przyczepek
     path('trailers/', views.trailer_list, name='trailer_list'),
     path('trailers/create/', views.trailer_create, name='trailer_create'),
+    path('trailers/events/', views.trailer_events, name='trailer_events'),
+    path('trailers/nearest/', views.trailer_nearest, name='trailer_nearest'),
     path('trailers/<int:pk>/', views.trailer_detail, name='trailer_detail'),
+    path('trailers/<int:pk>/probe/', views.trailer_probe, name='trailer_probe'),
     path('trailers/<int:pk>/edit/', views.trailer_edit, name='trailer_edit'),
     path('servicehistory/', views.servicehistory_list, name='servicehistory_list'),
     path('trailer/<int:pk>/logs/', views.trailer_logs, name='trailer_logs'),
@@ -43,6 +50,7 @@ urlpatterns = [
 
     # Widok logów
     path('log/', views.logs_view, name='log'),
+    path('log/export/', views.logs_export, name='logs_export'),
 
     # Widoki zarządzania magazynem
     path('warehouse/', views.warehouse_manager_view, name='warehouse_manager'),
@@ -52,7 +60,17 @@ urlpatterns = [
     path('warehouse/undo/', views.warehouse_undo_view, name='warehouse_undo'),
     path('warehouse/<int:pk>/edit/', views.warehouse_edit_item_view, name='warehouse_edit_item'),
     path('warehouse/logs/', views.warehouse_logs_view, name='warehouse_logs'),
+    path('warehouse/logs/export/', views.warehouse_logs_export, name='warehouse_logs_export'),
+    path('warehouse/export/', views.warehouse_export, name='warehouse_export'),
 
     # pdf
     path('report/pdf/', views.generate_report_pdf, name='generate_report_pdf'),
+    path('report/jobs/<int:pk>/', views.report_job, name='report_job'),
+    path('report/jobs/<int:pk>/status/', views.report_job_status, name='report_job_status'),
+    path('report/jobs/<int:pk>/download/', views.report_job_download, name='report_job_download'),
+
+    # API JSON (v1)
+    path('api/v1/<slug:resource>/', views.api_list, name='api_list'),
+    path('api/v1/<slug:resource>/<int:pk>/', views.api_detail, name='api_detail'),
+    path('sync/', views.sync_changes, name='sync'),
 ]
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+
+from .models import RentalTrailer, Trailer
+
+
+@dataclass
+class FleetUtilization:
+    """
+    Zajętość floty w dniach [start, start + len(rented_per_day)).
+
+    ``rented_per_day[i]`` - ile przyczepek było wynajętych w dniu start + i,
+    ``idle_days`` - liczba dni bez wynajmu dla każdej przyczepki z floty.
+    """
+    start: date
+    fleet_size: int
+    rented_per_day: np.ndarray
+    idle_days: dict
+
+    @property
+    def days(self):
+        return len(self.rented_per_day)
+
+    def day(self, index):
+        return self.start + timedelta(days=int(index))
+
+    def rented_on(self, day):
+        index = (day - self.start).days
+        if not 0 <= index < self.days:
+            raise ValueError(f"{day} poza zakresem {self.start} - {self.day(self.days - 1)}")
+        return int(self.rented_per_day[index])
+
+    def daily_rates(self):
+        """Procent wynajętej floty w każdym dniu"""
+        if not self.fleet_size:
+            return np.zeros(self.days)
+        return self.rented_per_day * 100.0 / self.fleet_size
+
+    def rate(self, last_days=None):
+        """Średnie wykorzystanie [%] z całego okresu albo z ostatnich ``last_days`` dni"""
+        rates = self.daily_rates()
+        if last_days:
+            rates = rates[-last_days:]
+        return float(rates.mean()) if len(rates) else 0.0
+
+    def most_idle(self, limit=10):
+        return sorted(self.idle_days.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+def fleet_utilization(start, end, trailer_ids=None):
+    """
+    Liczy zajętość floty w dniach [start, end] (włącznie) wektorowo w NumPy.
+
+    Przedziały wynajmów zamieniamy na numery dni i nanosimy na tablicę różnicową
+    (przyczepka x dzień): +1 w dniu rozpoczęcia, -1 dzień po zakończeniu. Suma
+    skumulowana po dniach daje liczbę aktywnych wynajmów, a ``> 0`` - zajętość,
+    więc nakładające się wynajmy tej samej przyczepki nie są liczone podwójnie.
+    """
+    if end < start:
+        raise ValueError("Koniec okresu przed początkiem")
+    trailers = Trailer.objects.all()
+    if trailer_ids is not None:
+        trailers = trailers.filter(pk__in=trailer_ids)
+    fleet = np.fromiter(trailers.values_list('pk', flat=True), dtype=np.int64)
+    fleet.sort()
+    days = (end - start).days + 1
+
+    bookings = RentalTrailer.objects.filter(start_date__lte=end, end_date__gte=start, trailer_id__in=trailers)
+    rows = list(bookings.values_list('trailer_id', 'start_date', 'end_date'))
+
+    occupied = np.zeros((len(fleet), days), dtype=bool)
+    if rows:
+        trailer_col, start_col, end_col = zip(*rows)
+        origin = start.toordinal()
+        first = np.clip(np.fromiter((d.toordinal() for d in start_col), np.int64, len(rows)) - origin, 0, days)
+        last = np.clip(np.fromiter((d.toordinal() for d in end_col), np.int64, len(rows)) - origin + 1, 0, days)
+        positions = np.searchsorted(fleet, np.fromiter(trailer_col, np.int64, len(rows)))
+
+        delta = np.zeros((len(fleet), days + 1), dtype=np.int32)
+        np.add.at(delta, (positions, first), 1)
+        np.add.at(delta, (positions, last), -1)
+        occupied = np.cumsum(delta[:, :days], axis=1) > 0
+
+    idle = days - occupied.sum(axis=1)
+    return FleetUtilization(
+        start=start,
+        fleet_size=len(fleet),
+        rented_per_day=occupied.sum(axis=0),
+        idle_days=dict(zip(fleet.tolist(), idle.tolist())),
+    )
@@ -1,41 +1,102 @@
-import os
-import subprocess
-import threading
-import time
-from .models import Trailer
-
-def ping_trailer(ip):
-    """Sprawdza, czy przyczepka odpowiada na ping"""
-    try:
-        output = subprocess.run(
-            ["ping", "-n", "1", ip] if os.name == "nt" else ["ping", "-c", "1", ip],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=2
-        )
-        return output.returncode == 0
-    except Exception:
-        return False
-
-def update_trailer_status():
-    """Sprawdza status każdej przyczepki i aktualizuje go w bazie"""
-    while True:
-        print("Sprawdzanie statusu przyczepek...")
-
-        trailers = Trailer.objects.all()
-        for trailer in trailers:
-            if trailer.status == "maintenance":
-                continue
-
-            is_active = ping_trailer(trailer.ip_address)
-
-            if is_active:
-                trailer.status = "active"
-            else:
-                trailer.status = "inactive"
-
-            trailer.save()
-
-        print("Statusy zaktualizowane. Kolejna aktualizacja za 5 minut...")
-        time.sleep(300000)
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import liveness, metrics, versions
+from .models import Trailer, TrailerLog
+from .probing import run_sweep
+
+PING_DEFAULTS = {
+    'INTERVAL': 300,
+    'CONCURRENCY': 256,
+    'TIMEOUT': 2.0,
+    'JITTER': 1.0,
+}
+
+STATUS_UPDATE_BATCH = 500
+PING_TRANSITION_MESSAGE = "Zmiana statusu (ping): {old} → {new}"
+
+
+def ping_settings():
+    """Ustawienia pingowania z settings.TRAILER_PING uzupełnione domyślnymi"""
+    return {**PING_DEFAULTS, **getattr(settings, 'TRAILER_PING', {})}
+
+
+def save_status_changes(changes):
+    """
+    Zapisuje tylko zmienione statusy [(przyczepka, nowy_status), ...]:
+    zbiorczy UPDATE dla każdego docelowego statusu i jeden bulk_create logów.
+
+    Stary status czytamy z bazy w tej samej transakcji - przyczepka mogła w trakcie
+    przebiegu trafić do serwisu albo zmienić status ręcznie, a log ma opisywać
+    tylko przejścia, które faktycznie zapisaliśmy. Zwraca ich liczbę.
+    """
+    if not changes:
+        return 0
+
+    labels = dict(Trailer.STATUS_CHOICES)
+    ids_by_status = defaultdict(list)
+    for trailer, new_status in changes:
+        ids_by_status[new_status].append(trailer.pk)
+
+    logs = []
+    with transaction.atomic():
+        now = timezone.now()
+        for new_status, ids in ids_by_status.items():
+            for i in range(0, len(ids), STATUS_UPDATE_BATCH):
+                current = dict(
+                    Trailer.objects
+                    .filter(pk__in=ids[i:i + STATUS_UPDATE_BATCH])
+                    .exclude(status__in=["maintenance", new_status])
+                    .values_list("pk", "status")
+                )
+                if not current:
+                    continue
+                Trailer.objects.filter(pk__in=current).update(status=new_status, updated_at=now)
+                logs.extend(
+                    TrailerLog(
+                        trailer_id=trailer_id,
+                        event_type="status_change",
+                        message=PING_TRANSITION_MESSAGE.format(old=labels[old], new=labels[new_status]),
+                    )
+                    for trailer_id, old in current.items()
+                )
+        TrailerLog.objects.bulk_create(logs, batch_size=STATUS_UPDATE_BATCH)
+
+    if logs:
+        # update() omija sygnały post_save, więc wersję danych i metryki dashboardu odświeżamy ręcznie.
+        versions.bump('trailer')
+        metrics.refresh_trailer_counts()
+    return len(logs)
+
+
+def check_trailers():
+    """Jeden przebieg: pinguje równolegle wszystkie przyczepki i zapisuje zmiany statusu"""
+    config = ping_settings()
+    trailers = list(
+        Trailer.objects
+        .exclude(status="maintenance")
+        .only("id", "ip_address", "status")
+    )
+
+    report = run_sweep(
+        [(trailer, trailer.ip_address) for trailer in trailers],
+        concurrency=config['CONCURRENCY'],
+        timeout=config['TIMEOUT'],
+        jitter=config['JITTER'],
+    )
+
+    liveness.record_sweep({result.key.pk: result.alive for result in report.results})
+
+    changes = []
+    for result in report.results:
+        trailer = result.key
+        new_status = "active" if result.alive else "inactive"
+        if trailer.status != new_status:
+            changes.append((trailer, new_status))
+
+    changed = save_status_changes(changes)
+    return report, changed
+
@@ -0,0 +1,43 @@
+import hashlib
+import uuid
+
+from django.core.cache import caches
+
+VERSION_KEY = "version:{}"
+
+
+def _cache():
+    return caches['shared']
+
+
+def _new_token():
+    return uuid.uuid4().hex[:12]
+
+
+def get_versions(*labels):
+    """
+    Aktualne wersje danych, np. {'trailer': '3f9c...'}. Wersja to losowy token
+    zmieniany przy każdym zapisie modelu, więc zgubiony wpis w cache jedynie
+    unieważnia to, co było od niego zależne.
+    """
+    cache = _cache()
+    keys = {label: VERSION_KEY.format(label) for label in labels}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for label, key in keys.items():
+        if key not in found:
+            cache.add(key, _new_token(), None)
+            found[key] = cache.get(key)
+        versions[label] = found[key]
+    return versions
+
+
+def version_key(*labels):
+    """Jeden skrót ze wszystkich wersji - do kluczy cache i nazw plików"""
+    versions = get_versions(*labels)
+    raw = "|".join(f"{label}={versions[label]}" for label in sorted(versions))
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def bump(*labels):
+    _cache().set_many({VERSION_KEY.format(label): _new_token() for label in labels}, None)
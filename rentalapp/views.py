@@ -1,8 +1,10 @@
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
-from django.views.decorators.http import require_POST
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET, require_POST
 
+from .modules.api import ApiViews, api_login_required
 from .modules.auth import AuthViews
 from .modules.dashboard import DashboardViews
 from .modules.logs import LogsViews
@@ -29,6 +31,18 @@ def trailer_list(request):
 def trailer_detail(request, pk):
     return TrailerViews.trailer_detail(request, pk)
 
+@login_required
+async def trailer_probe(request, pk):
+    return await TrailerViews.trailer_probe(request, pk)
+
+@login_required
+async def trailer_events(request):
+    return await TrailerViews.trailer_events(request)
+
+@login_required
+def trailer_nearest(request):
+    return TrailerViews.trailer_nearest(request)
+
 @login_required
 def trailer_create(request):
     return TrailerViews.trailer_create(request)
@@ -53,6 +67,10 @@ def trailer_logs(request, pk):
 def logs_view(request):
     return LogsViews.logs_view(request)
 
+@login_required
+def logs_export(request):
+    return LogsViews.logs_export(request)
+
 
 #AUTH
 
@@ -73,6 +91,10 @@ def assign_role(request):
 def map_view(request):
     return MapViews.map_view(request)
 
+@login_required
+def map_trailers(request):
+    return MapViews.map_trailers(request)
+
 
 #MAGAZYN
 
@@ -106,6 +128,14 @@ def warehouse_edit_item_view(request, pk):
 def warehouse_logs_view(request):
     return LogsViews.warehouse_logs_view(request)
 
+@login_required
+def warehouse_logs_export(request):
+    return LogsViews.warehouse_logs_export(request)
+
+@login_required
+def warehouse_export(request):
+    return WarehouseViews.warehouse_export(request)
+
 
 #DASHBOARD
 
@@ -120,6 +150,11 @@ def dashboard_view(request):
 def company_rent_detail(request, pk):
     return RentViews.company_rent_detail(request, pk)
 
+@login_required
+@require_POST
+def bulk_assign_trailers(request, pk):
+    return RentViews.bulk_assign_trailers(request, pk)
+
 @login_required
 def add_rental(request):
     return RentViews.add_rental(request)
@@ -146,6 +181,10 @@ def company_list_view(request):
 def rent_view(request):
     return RentViews.rent_view(request)
 
+@login_required
+def rentals_export(request):
+    return RentViews.rentals_export(request)
+
 @login_required
 def rental_history_view(request):
     return RentViews.rental_history_view(request)
@@ -161,6 +200,10 @@ def servicehistory_list(request):
 def service_history_view(request):
     return ServiceViews.service_history_view(request)
 
+@login_required
+def service_history_export(request):
+    return ServiceViews.service_history_export(request)
+
 @login_required
 def active_services_view(request):
     return ServiceViews.active_services_view(request)
@@ -179,3 +222,36 @@ def mark_service_done(request, pk):
 @login_required
 def generate_report_pdf(request):
     return ReportsViews.generate_report_pdf(request)
+
+@login_required
+def report_job(request, pk):
+    return ReportsViews.report_job(request, pk)
+
+@login_required
+def report_job_status(request, pk):
+    return ReportsViews.report_job_status(request, pk)
+
+@login_required
+def report_job_download(request, pk):
+    return ReportsViews.report_job_download(request, pk)
+
+
+#API
+
+@api_login_required
+@gzip_page
+@require_GET
+async def api_list(request, resource):
+    return await ApiViews.list(request, resource)
+
+@api_login_required
+@gzip_page
+@require_GET
+async def api_detail(request, resource, pk):
+    return await ApiViews.detail(request, resource, pk)
+
+@api_login_required
+@gzip_page
+@require_GET
+async def sync_changes(request):
+    return await ApiViews.sync(request)
@@ -0,0 +1,177 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import WorkerLease
+from .report_jobs import dispatch_report_jobs, report_settings, shutdown_report_pool
+from .retention import apply_retention, retention_settings
+from .utils import check_trailers, ping_settings
+
+WORKER_DEFAULTS = {
+    'LEASE_NAME': 'periodic-jobs',
+    'LEASE_TTL': 60,
+    'TICK': 1.0,
+}
+
+
+def worker_settings():
+    """Ustawienia procesu roboczego z settings.WORKER uzupełnione domyślnymi"""
+    return {**WORKER_DEFAULTS, **getattr(settings, 'WORKER', {})}
+
+
+class Lease:
+    """
+    Dzierżawa w tabeli WorkerLease: zadania okresowe wykonuje tylko ten proces,
+    który ją trzyma. Dzierżawa wygasa po ``ttl`` sekundach bez odnowienia,
+    więc po awarii procesu przejmuje ją kolejna instancja.
+    """
+
+    def __init__(self, name, ttl):
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire(self):
+        """Przejmuje albo odnawia dzierżawę. Zwraca True, jeśli należy do nas"""
+        now = timezone.now()
+        WorkerLease.objects.get_or_create(name=self.name, defaults={'expires_at': now})
+        updated = (
+            WorkerLease.objects
+            .filter(name=self.name)
+            .filter(Q(owner=self.owner) | Q(owner="") | Q(expires_at__lt=now))
+            .update(owner=self.owner, expires_at=now + timedelta(seconds=self.ttl))
+        )
+        return updated == 1
+
+    def release(self):
+        WorkerLease.objects.filter(name=self.name, owner=self.owner).update(owner="", expires_at=timezone.now())
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    interval: object
+    func: object
+    on_stop: object = None
+    next_run: float = 0.0
+
+    def current_interval(self):
+        return self.interval() if callable(self.interval) else self.interval
+
+
+def run_status_sweep():
+    report, changed = check_trailers()
+    return f"{report.summary()}, zmian: {changed}"
+
+
+def default_jobs():
+    return [
+        PeriodicJob('trailer_status', lambda: ping_settings()['INTERVAL'], run_status_sweep),
+        PeriodicJob('log_retention', lambda: retention_settings()['INTERVAL'], apply_retention),
+        PeriodicJob('report_jobs', lambda: report_settings()['POLL_INTERVAL'], dispatch_report_jobs,
+                    on_stop=shutdown_report_pool),
+    ]
+
+
+class Worker:
+    """Pętla zadań okresowych uruchamiana przez ``manage.py run_worker``"""
+
+    def __init__(self, jobs=None, lease=None, tick=None, log=print):
+        config = worker_settings()
+        self.jobs = jobs if jobs is not None else default_jobs()
+        self.lease = lease or Lease(config['LEASE_NAME'], config['LEASE_TTL'])
+        self.tick = tick if tick is not None else config['TICK']
+        self.log = log
+        self.stop_event = threading.Event()
+        self.is_leader = False
+        self.lease_check_at = 0.0
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        self.log(f"Proces roboczy {self.lease.owner} uruchomiony.")
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                self.run_pending()
+                self.stop_event.wait(self.tick)
+        finally:
+            for job in self.jobs:
+                if job.on_stop:
+                    job.on_stop()
+            if self.is_leader:
+                self.lease.release()
+            self.log(f"Proces roboczy {self.lease.owner} zatrzymany.")
+
+    def refresh_lease(self, force=False):
+        """Odnawia dzierżawę co ~1/3 jej ważności, żeby nie zapisywać do bazy w każdym takcie"""
+        now = time.monotonic()
+        if not force and now < self.lease_check_at:
+            return self.is_leader
+        is_leader = self.lease.acquire()
+        self.lease_check_at = now + self.lease.ttl / 3
+        if is_leader != self.is_leader:
+            self.log("Przejęto dzierżawę zadań okresowych." if is_leader
+                     else "Dzierżawa należy do innego procesu, oczekiwanie...")
+            self.is_leader = is_leader
+        return is_leader
+
+    @contextmanager
+    def lease_heartbeat(self):
+        """
+        Odnawia dzierżawę z osobnego wątku, dopóki trwa zadanie - przebieg pingów
+        po tysiącach nieosiągalnych przyczepek trwa dłużej niż LEASE_TTL, a po
+        wygaśnięciu dzierżawy inny proces uruchomiłby drugi, równoległy przebieg.
+        """
+        done = threading.Event()
+
+        def renew():
+            try:
+                while not done.wait(self.lease.ttl / 3):
+                    try:
+                        if not self.lease.acquire():
+                            self.log("Utracono dzierżawę w trakcie zadania.")
+                    except Exception as exc:
+                        self.log(f"Błąd odnawiania dzierżawy: {exc!r}")
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=renew, name='lease-heartbeat', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def run_pending(self):
+        if not self.refresh_lease():
+            return
+
+        for job in self.jobs:
+            if self.stop_event.is_set():
+                return
+            if time.monotonic() < job.next_run:
+                continue
+            started = time.monotonic()
+            try:
+                with self.lease_heartbeat():
+                    result = job.func()
+                if result:
+                    self.log(f"[{job.name}] {result} ({time.monotonic() - started:.2f} s)")
+            except Exception as exc:
+                self.log(f"[{job.name}] błąd: {exc!r}")
+            job.next_run = time.monotonic() + job.current_interval()
+            if not self.refresh_lease(force=time.monotonic() - started > self.lease.ttl / 3):
+                return
@@ -0,0 +1,30 @@
+// Zmiany statusu przyczepek na żywo (Server-Sent Events z widoku trailer_events).
+// EventSource sam łączy się ponownie i wysyła Last-Event-ID, więc nie gubimy zdarzeń.
+window.TrailerEvents = (function () {
+    const dots = {
+        active: '<span class="text-success fw-bold">●</span>',
+        maintenance: '<span class="text-warning fw-bold">●</span>',
+        inactive: '<span class="text-danger fw-bold">●</span>'
+    };
+
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
+    function statusHtml(status, label) {
+        return (dots[status] || dots.inactive) + ' ' + escapeHtml(label);
+    }
+
+    function subscribe(url, onStatus) {
+        if (!window.EventSource || !url) return null;
+        const source = new EventSource(url);
+        source.addEventListener('status', function (event) {
+            onStatus(JSON.parse(event.data));
+        });
+        return source;
+    }
+
+    return {statusHtml: statusHtml, subscribe: subscribe};
+})();